@@ -1,11 +1,21 @@
+import contextvars
 import logging
 import json
 import os
-from io import BytesIO
-from azure.storage.blob import BlobServiceClient
-from azure.identity import DefaultAzureCredential
-from fastavro import writer, parse_schema, reader
+import math
+import time
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from azure.core.exceptions import ResourceNotFoundError
+from fastavro import parse_schema
 from database_connection import DatabaseConnection
+from blob_storage import DEFAULT_BLOCK_SIZE, BlobStreamReader, BlockBlobWriter, get_blob_service_client
+from backup_formats import backup_codec, backup_format, check_format, read_batches, write_batches
+from api_transactional_gc import REFERENCE_TABLES, reference_cache
+from result_cache import reporting_cache
+from hire_aggregates import HireAggregates, aggregates_enabled
+from metrics import stage
 
 # Configurar el esquema de AVRO para el respaldo
 def get_avro_schema(table_name):
@@ -40,123 +50,714 @@ def get_avro_schema(table_name):
     }
     return parse_schema(schemas[table_name])
 
+# Columna clave usada para particionar cada tabla en rangos
+TABLE_KEYS = {
+    "HiredEmployees": os.getenv("HIRED_EMPLOYEES_KEY_COLUMN", "EmployeeID"),
+    "Departments": "DepartmentID",
+    "Jobs": "JobID"
+}
+
+# Cantidad de archivos (partes) por tabla; solo conviene partir las tablas grandes
+TABLE_PARTITIONS = {
+    "HiredEmployees": int(os.getenv("BACKUP_PARTITIONS", "4")),
+    "Departments": 1,
+    "Jobs": 1
+}
+
+# Orden de restauracion: HiredEmployees depende de Departments y Jobs
+RESTORE_STAGES = [["Departments", "Jobs"], ["HiredEmployees"]]
+
+MAX_WORKERS = int(os.getenv("BACKUP_MAX_WORKERS", "4"))
+
+# Una fila con clave menor a la marca de agua puede confirmarse despues de leer el MAX (IDENTITY asigna la clave
+# al insertar, no al confirmar). Cada respaldo guarda las claves exportadas en esta ventana bajo la marca de agua
+# y el siguiente delta exporta las de la ventana que falten
+BACKUP_WATERMARK_OVERLAP = int(os.getenv("BACKUP_WATERMARK_OVERLAP", "1000"))
+
+# Sentencias y columnas usadas al restaurar cada tabla
+RESTORE_STATEMENTS = {
+    "HiredEmployees": (
+        "INSERT INTO GlobantPoc.HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
+        ["FirstName", "LastName", "HireDate", "JobID", "DepartmentID"]
+    ),
+    "Departments": (
+        "INSERT INTO GlobantPoc.Departments (DepartmentID, DepartmentName) VALUES (?, ?)",
+        ["DepartmentID", "DepartmentName"]
+    ),
+    "Jobs": (
+        "INSERT INTO GlobantPoc.Jobs (JobID, JobTitle) VALUES (?, ?)",
+        ["JobID", "JobTitle"]
+    )
+}
+
+
+# Tablas cuya clave no se restaura (la asigna IDENTITY): tras restaurarlas la marca de agua deja de valer
+def key_is_restored(table_name):
+    return TABLE_KEYS[table_name] in RESTORE_STATEMENTS[table_name][1]
+
+
+def restore_stages(tables):
+    ordered = [table for stage_tables in RESTORE_STAGES for table in stage_tables]
+    stages = [[table for table in stage_tables if table in tables] for stage_tables in RESTORE_STAGES]
+    stages.append([table for table in tables if table not in ordered])
+    return [stage_tables for stage_tables in stages if stage_tables]
+
+
+# Las claves mayores que este valor quedan en la ventana de filas confirmadas tarde
+def recent_from(watermark):
+    return watermark - BACKUP_WATERMARK_OVERLAP if watermark is not None else None
+
+
+def checkpoint_blob_name(blob_name):
+    return f"{blob_name}.checkpoint.json"
+
+
+def full_prefix(table_name):
+    return f"{table_name}_backup"
+
+
+def snapshot_prefix(table_name, kind, created_at):
+    return f"{table_name}_{kind}_{created_at.strftime('%Y%m%dT%H%M%S%fZ')}"
+
+
+def chain_blob_name(table_name):
+    return f"{table_name}_backup.chain.json"
+
+
+def manifest_blob_name(prefix):
+    return f"{prefix}.manifest.json"
+
+
+PART_EXTENSIONS = {"avro": "avro", "parquet": "parquet", "arrow": "arrows"}
+
+
+def part_blob_name(prefix, index, format_name="avro"):
+    return f"{prefix}.part{index:04d}.{PART_EXTENSIONS[format_name]}"
+
+
+def split_key_range(min_key, max_key, partitions):
+    if min_key is None or max_key is None:
+        return [None]
+    step = max(1, math.ceil((max_key - min_key + 1) / max(partitions, 1)))
+    return [[low, min(low + step, max_key + 1)] for low in range(min_key, max_key + 1, step)]
+
+
+def read_json_blob(blob_service_client, container_name, blob_name):
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+    try:
+        return json.loads(blob_client.download_blob().readall())
+    except ResourceNotFoundError:
+        return None
+
+
+def write_json_blob(blob_service_client, container_name, blob_name, data):
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+    blob_client.upload_blob(json.dumps(data, indent=2).encode("utf-8"), overwrite=True)
+
+
+def _log_throughput(action, table_name, rows, size, elapsed):
+    elapsed = max(elapsed, 1e-9)
+    megabytes = size / (1024 * 1024)
+    logging.info(
+        f"{action} for table {table_name} completed: {rows} rows, {megabytes:.2f} MB in {elapsed:.2f}s "
+        f"({rows / elapsed:.0f} rows/s, {megabytes / elapsed:.2f} MB/s)."
+    )
+
+# Lee el cursor por lotes con fetchmany y entrega cada lote como tuplas con las columnas de fields
+# key_column: omite las filas con clave en exclude y junta en recent_keys las claves mayores que recent_from
+class RowStream:
+    def __init__(self, cursor, fetch_size, fields, on_batch=None, key_column=None, recent_from=None, exclude=None):
+        self.cursor = cursor
+        self.fetch_size = fetch_size
+        self.fields = fields
+        self.on_batch = on_batch
+        self.key_column = key_column
+        self.recent_from = recent_from
+        self.exclude = exclude or set()
+        self.recent_keys = []
+        self.count = 0
+
+    def __iter__(self):
+        columns = [column[0] for column in self.cursor.description]
+        positions = [columns.index(field) for field in self.fields]
+        key = columns.index(self.key_column) if self.key_column is not None else None
+        hire_date = self.fields.index("HireDate") if "HireDate" in self.fields else None
+        while True:
+            batch = self.cursor.fetchmany(self.fetch_size)
+            if not batch:
+                break
+            if key is not None:
+                batch = [row for row in batch if row[key] not in self.exclude]
+                if self.recent_from is not None:
+                    self.recent_keys.extend(row[key] for row in batch if row[key] > self.recent_from)
+                if not batch:
+                    continue
+            if self.on_batch is not None:
+                self.on_batch(len(batch))
+            rows = [tuple(row[position] for position in positions) for row in batch]
+            if hire_date is not None:
+                rows = [
+                    row if row[hire_date] is None else row[:hire_date] + (str(row[hire_date]),) + row[hire_date + 1:]
+                    for row in rows
+                ]
+            self.count += len(rows)
+            yield rows
+
+# Agrupa filas sueltas en lotes de batch_size
+def batched(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+# Cuenta los registros a medida que se consumen
+class RecordCounter:
+    def __init__(self, records):
+        self.records = records
+        self.count = 0
+
+    def __iter__(self):
+        for record in self.records:
+            self.count += 1
+            yield record
+
+
+# Recorre en orden las filas de varios blobs de respaldo (cualquier formato), descargandolos por partes
+def iter_backup_rows(blob_service_client, container_name, blob_names, fields, batch_size):
+    for blob_name in blob_names:
+        blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+        for batch in read_batches(BlobStreamReader(blob_client.download_blob()), fields, batch_size):
+            yield from batch
+
 # Clase para manejar el respaldo de datos
 class DataBackup:
-    def __init__(self):
+    # progress: JobProgress opcional (jobs.py) para informar avance y atender cancelaciones
+    # format_name/codec: por defecto BACKUP_FORMAT y BACKUP_CODEC (avro con deflate)
+    def __init__(self, progress=None, format_name=None, codec=None):
+        self.progress = progress
+        self.format = (format_name or backup_format()).lower()
+        self.codec = (codec or backup_codec(self.format)).lower()
+        check_format(self.format, self.codec)
         self.db_connection = DatabaseConnection()
         self.container_name = os.getenv("BLOB_CONTAINER_NAME")
-        self.blob_service_client = BlobServiceClient.from_connection_string(
-            os.getenv("BLOB_STORAGE_CONNECTION_STRING")
-        )
+        self.blob_service_client = get_blob_service_client()
         self.tables = ["HiredEmployees", "Departments", "Jobs"]
+        self.fetch_size = int(os.getenv("BACKUP_FETCH_SIZE", "5000"))
+        self.block_size = DEFAULT_BLOCK_SIZE
+        self.max_workers = MAX_WORKERS
+        self.compact_part_rows = int(os.getenv("BACKUP_COMPACT_PART_ROWS", "1000000"))
+
+    def backup_table(self, table_name, mode="full"):
+        return self.backup_tables([table_name], mode)[0]
+
+    def backup_all_tables(self, mode="full"):
+        return self.backup_tables(self.tables, mode)
+
+    # mode: "full" (reinicia la cadena), "incremental" (solo filas nuevas) o "compact"
+    def backup_tables(self, tables, mode="full"):
+        if mode == "compact":
+            return [self.compact_table(table_name) for table_name in tables]
+
+        start = time.perf_counter()
+        created_at = datetime.now(timezone.utc)
+        plans = {}
+        results = {}
+        for table_name in tables:
+            try:
+                backup_chain = self._read_chain(table_name) if mode == "incremental" else None
+                if backup_chain is not None and backup_chain.get("fullRequired"):
+                    # La tabla se restauro y sus claves cambiaron: un delta sobre la marca de agua anterior no sirve
+                    logging.info(f"Table {table_name} was restored since its last full backup, taking a full backup.")
+                    backup_chain = None
+                since = backup_chain["entries"][-1]["watermark"] if backup_chain else None
+                key_ranges, watermark, row_count = self._partition_ranges(table_name, since)
+
+                # Partes a exportar: (rango de claves, claves a omitir)
+                exports = [(key_range, None) for key_range in key_ranges]
+                carried = []
+                if backup_chain is not None:
+                    if watermark is None:
+                        exports = []
+                    # Filas confirmadas tarde bajo la marca de agua anterior (solo cadenas que guardan recentKeys)
+                    recent = self._recent_keys(backup_chain) if since is not None else None
+                    late = self._late_keys(table_name, since, recent) if recent is not None else set()
+                    if late:
+                        exports.append(([since - BACKUP_WATERMARK_OVERLAP + 1, since + 1], set(recent)))
+                        row_count += len(late)
+                    if not exports:
+                        results[table_name] = {"status": "success", "message": f"No new rows in table {table_name} since the last backup.", "rows": 0}
+                        continue
+                    watermark = watermark if watermark is not None else since
+                    carried = recent or []
+                if self.progress is not None:
+                    self.progress.set_total(table_name, row_count)
+
+                # Cada respaldo completo va en su propio prefijo: el anterior sigue intacto hasta cambiar la cadena
+                kind = "full" if backup_chain is None else "delta"
+                plans[table_name] = (kind, snapshot_prefix(table_name, kind, created_at), exports, watermark, backup_chain, carried)
+            except Exception as e:
+                logging.error(f"Error in backing up table {table_name}: {str(e)}")
+                results[table_name] = {"status": "error", "message": str(e)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="backup") as executor:
+            futures = {
+                table_name: [
+                    executor.submit(
+                        contextvars.copy_context().run, self._export_part, table_name, part_blob_name(prefix, index, self.format),
+                        key_range, recent_from(watermark), exclude
+                    )
+                    for index, (key_range, exclude) in enumerate(exports)
+                ]
+                for table_name, (kind, prefix, exports, watermark, backup_chain, carried) in plans.items()
+            }
+
+            for table_name, part_futures in futures.items():
+                kind, prefix, _, watermark, backup_chain, carried = plans[table_name]
+                try:
+                    parts = self._collect_parts(part_futures)
+                    exported = {key for part in parts for key in part.pop("recentKeys")}
+                    recent = sorted(exported | {key for key in carried if key > recent_from(watermark)})
+                    previous_chain = self._read_chain(table_name) if kind == "full" else None
+                    manifest = self._write_manifest(table_name, prefix, parts, kind, watermark, created_at, recent)
+                    self._append_to_chain(table_name, backup_chain, kind, prefix, manifest)
+                    # La cadena ya apunta al respaldo nuevo: el conjunto anterior se puede borrar
+                    if previous_chain is not None:
+                        self._delete_chain(previous_chain)
+                    _log_throughput("Backup", table_name, manifest["rowCount"], manifest["bytes"], time.perf_counter() - start)
+                    results[table_name] = {
+                        "status": "success",
+                        "message": f"Backup for table {table_name} completed.",
+                        "kind": kind,
+                        "format": self.format,
+                        "codec": self.codec,
+                        "rows": manifest["rowCount"],
+                        "bytes": manifest["bytes"],
+                        "parts": len(parts)
+                    }
+                except Exception as e:
+                    logging.error(f"Error in backing up table {table_name}: {str(e)}")
+                    results[table_name] = {"status": "error", "message": str(e)}
+
+        return [results[table_name] for table_name in tables]
+
+    # Espera todas las partes; si alguna falla se borran las que se alcanzaron a escribir y se propaga el error
+    def _collect_parts(self, part_futures):
+        parts = []
+        errors = []
+        for future in part_futures:
+            try:
+                parts.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+        if errors:
+            for part in parts:
+                self._delete_blob(part["blob"])
+            raise RuntimeError("; ".join(errors))
+        return parts
+
+    # Borra los blobs (partes y manifests) de una cadena que ya fue reemplazada
+    def _delete_chain(self, backup_chain, manifests=None):
+        for position, entry in enumerate(backup_chain["entries"]):
+            try:
+                manifest = manifests[position] if manifests is not None else read_json_blob(
+                    self.blob_service_client, self.container_name, entry["manifest"]
+                )
+                blob_names = [part["blob"] for part in manifest["parts"]] if manifest is not None else []
+                for blob_name in blob_names + [entry["manifest"]]:
+                    self._delete_blob(blob_name)
+            except Exception as e:
+                logging.warning(f"Could not delete replaced backup {entry['manifest']}: {str(e)}")
+
+    # Claves exportadas en la ventana bajo la marca de agua por el ultimo respaldo de la cadena
+    def _recent_keys(self, backup_chain):
+        manifest = read_json_blob(self.blob_service_client, self.container_name, backup_chain["entries"][-1]["manifest"])
+        return manifest.get("recentKeys") if manifest is not None else None
+
+    # Claves de la ventana bajo la marca de agua que ningun respaldo exporto (confirmadas despues de leerla)
+    def _late_keys(self, table_name, since, recent):
+        key_column = TABLE_KEYS[table_name]
+        connection = self.db_connection.connect()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT {key_column} FROM GlobantPoc.{table_name} WHERE {key_column} > ? AND {key_column} <= ?",
+                since - BACKUP_WATERMARK_OVERLAP, since
+            )
+            return {row[0] for row in cursor.fetchall()} - set(recent)
+        finally:
+            cursor.close()
+            connection.close()
 
-    def backup_table(self, table_name):
+    # Rangos de la columna clave a exportar, marca de agua (maximo exportado) y filas a exportar
+    def _partition_ranges(self, table_name, since=None):
+        key_column = TABLE_KEYS[table_name]
         connection = self.db_connection.connect()
         cursor = connection.cursor()
+        try:
+            if since is None:
+                cursor.execute(f"SELECT MIN({key_column}), MAX({key_column}), COUNT(*) FROM GlobantPoc.{table_name}")
+            else:
+                cursor.execute(f"SELECT MIN({key_column}), MAX({key_column}), COUNT(*) FROM GlobantPoc.{table_name} WHERE {key_column} > ?", since)
+            min_key, max_key, row_count = cursor.fetchone()
+            return split_key_range(min_key, max_key, TABLE_PARTITIONS.get(table_name, 1)), max_key, row_count
+        finally:
+            cursor.close()
+            connection.close()
+
+    def _export_part(self, table_name, blob_name, key_range, recent_from=None, exclude=None):
+        if self.progress is not None:
+            self.progress.check()
+        with stage("connect"):
+            connection = self.db_connection.connect()
+        cursor = connection.cursor()
 
         try:
-            cursor.execute(f"SELECT * FROM GlobantPoc.{table_name}")
-            
-            rows = []
-            for row in cursor.fetchall():
-                row_dict = dict(zip([column[0] for column in cursor.description], row))
-                
-                if "HireDate" in row_dict and row_dict["HireDate"] is not None:
-                    row_dict["HireDate"] = str(row_dict["HireDate"])
-                
-                rows.append(row_dict)
-
-            # Convertir datos a formato AVRO
-            avro_schema = get_avro_schema(table_name)
-            avro_buffer = BytesIO()
-            writer(avro_buffer, avro_schema, rows)
-            avro_buffer.seek(0)
-
-            # Subir a Blob Storage
-            blob_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=f"{table_name}_backup.avro")
-            blob_client.upload_blob(avro_buffer, overwrite=True)
-
-            logging.info(f"Backup for table {table_name} completed and saved to blob storage.")
-            return {"status": "success", "message": f"Backup for table {table_name} completed."}
-        
-        except Exception as e:
-            logging.error(f"Error in backing up table {table_name}: {str(e)}")
-            return {"status": "error", "message": str(e)}
-        
+            if key_range is None:
+                cursor.execute(f"SELECT * FROM GlobantPoc.{table_name}")
+            else:
+                key_column = TABLE_KEYS[table_name]
+                cursor.execute(
+                    f"SELECT * FROM GlobantPoc.{table_name} WHERE {key_column} >= ? AND {key_column} < ?",
+                    *key_range
+                )
+            on_batch = None
+            if self.progress is not None:
+                on_batch = lambda count: self.progress.advance(table_name, rows=count)
+            rows = RowStream(cursor, self.fetch_size, RESTORE_STATEMENTS[table_name][1], on_batch, TABLE_KEYS[table_name], recent_from, exclude)
+            # Lectura, serializacion y subida van intercaladas, se miden juntas
+            with stage("backup_export"):
+                size, checksum = self._write_part(table_name, blob_name, rows)
+            if self.progress is not None:
+                self.progress.advance(table_name, size=size)
+            return {"blob": blob_name, "range": key_range, "rows": rows.count, "bytes": size, "sha256": checksum, "recentKeys": rows.recent_keys}
+
         finally:
             cursor.close()
             connection.close()
 
-    def backup_all_tables(self):
-        results = []
-        for table in self.tables:
-            result = self.backup_table(table)
-            results.append(result)
-        return results
+    # Los lotes se escriben en el formato elegido a medida que se leen y se suben por bloques
+    def _write_part(self, table_name, blob_name, batches):
+        avro_schema = get_avro_schema(table_name)
+        blob_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=blob_name)
+        with BlockBlobWriter(blob_client, self.block_size) as blob_writer:
+            write_batches(blob_writer, self.format, self.codec, avro_schema, batches)
+        return blob_writer.bytes_written, blob_writer.sha256
+
+    def _write_manifest(self, table_name, prefix, parts, kind, watermark, created_at, recent_keys=None):
+        manifest = {
+            "table": table_name,
+            "kind": kind,
+            "createdAt": created_at.isoformat(),
+            "format": self.format,
+            "codec": self.codec,
+            "keyColumn": TABLE_KEYS[table_name],
+            "watermark": watermark,
+            "recentKeys": recent_keys or [],
+            "rowCount": sum(part["rows"] for part in parts),
+            "bytes": sum(part["bytes"] for part in parts),
+            "parts": parts
+        }
+        write_json_blob(self.blob_service_client, self.container_name, manifest_blob_name(prefix), manifest)
+        return manifest
+
+    def _read_chain(self, table_name):
+        return read_json_blob(self.blob_service_client, self.container_name, chain_blob_name(table_name))
+
+    # Un respaldo completo reinicia la cadena; un delta se agrega al final
+    # full_required: la tabla se restauro despues de estos respaldos y el proximo incremental debe ser completo
+    def _append_to_chain(self, table_name, backup_chain, kind, prefix, manifest, full_required=False):
+        entry = {
+            "kind": kind,
+            "manifest": manifest_blob_name(prefix),
+            "watermark": manifest["watermark"],
+            "createdAt": manifest["createdAt"],
+            "rows": manifest["rowCount"]
+        }
+        if kind == "full" or backup_chain is None:
+            backup_chain = {"table": table_name, "keyColumn": TABLE_KEYS[table_name], "entries": []}
+            if full_required:
+                backup_chain["fullRequired"] = True
+        backup_chain["entries"].append(entry)
+        write_json_blob(self.blob_service_client, self.container_name, chain_blob_name(table_name), backup_chain)
+
+    # Reescribe el respaldo completo y sus deltas como un nuevo respaldo completo
+    def compact_table(self, table_name):
+        try:
+            start = time.perf_counter()
+            backup_chain = self._read_chain(table_name)
+            if backup_chain is None or len(backup_chain["entries"]) < 2:
+                return {"status": "success", "message": f"Nothing to compact for table {table_name}.", "rows": 0}
+
+            created_at = datetime.now(timezone.utc)
+            prefix = snapshot_prefix(table_name, "full", created_at)
+            manifests = [
+                read_json_blob(self.blob_service_client, self.container_name, entry["manifest"])
+                for entry in backup_chain["entries"]
+            ]
+            records = iter_backup_rows(self.blob_service_client, self.container_name, [
+                part["blob"] for manifest in manifests for part in manifest["parts"]
+            ], RESTORE_STATEMENTS[table_name][1], self.fetch_size)
+
+            # Partes de hasta compact_part_rows filas cada una, en el formato configurado
+            parts = []
+            for first in records:
+                rows = RecordCounter(chain([first], islice(records, self.compact_part_rows - 1)))
+                blob_name = part_blob_name(prefix, len(parts), self.format)
+                size, checksum = self._write_part(table_name, blob_name, batched(rows, self.fetch_size))
+                parts.append({"blob": blob_name, "range": None, "rows": rows.count, "bytes": size, "sha256": checksum})
+
+            watermark = backup_chain["entries"][-1]["watermark"]
+            manifest = self._write_manifest(table_name, prefix, parts, "full", watermark, created_at, manifests[-1].get("recentKeys"))
+            self._append_to_chain(table_name, None, "full", prefix, manifest, backup_chain.get("fullRequired", False))
+
+            # Los blobs de la cadena anterior ya no se usan
+            self._delete_chain(backup_chain, manifests)
+
+            _log_throughput("Compaction", table_name, manifest["rowCount"], manifest["bytes"], time.perf_counter() - start)
+            return {
+                "status": "success",
+                "message": f"Backup chain for table {table_name} compacted.",
+                "kind": "full",
+                "rows": manifest["rowCount"],
+                "bytes": manifest["bytes"],
+                "parts": len(parts),
+                "mergedEntries": len(manifests)
+            }
+        except Exception as e:
+            logging.error(f"Error in compacting backups of table {table_name}: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    def _delete_blob(self, blob_name):
+        try:
+            self.blob_service_client.get_blob_client(container=self.container_name, blob=blob_name).delete_blob()
+        except ResourceNotFoundError:
+            pass
 
 class DataRestore:
-    def __init__(self):
+    def __init__(self, progress=None):
+        self.progress = progress
         self.db_connection = DatabaseConnection()
         self.container_name = os.getenv("BLOB_CONTAINER_NAME")
-        self.blob_service_client = BlobServiceClient.from_connection_string(
-            os.getenv("BLOB_STORAGE_CONNECTION_STRING")
-        )
+        self.blob_service_client = get_blob_service_client()
         self.tables = ["HiredEmployees", "Departments", "Jobs"]
+        self.max_workers = MAX_WORKERS
+        self.batch_size = int(os.getenv("RESTORE_BATCH_SIZE", "5000"))
+        self.commit_interval = int(os.getenv("RESTORE_COMMIT_INTERVAL", "50000"))
 
-    def restore_table(self, table_name):
-        connection = self.db_connection.connect()
+    def restore_table(self, table_name, resume=False, until=None):
+        return self.restore_tables([table_name], resume, until)[0]
+
+    def restore_all_tables(self, resume=False, until=None):
+        return self.restore_tables(self.tables, resume, until)
+
+    # Restaura por etapas (Departments/Jobs antes que HiredEmployees), las partes de cada etapa en paralelo
+    # until: fecha ISO 8601; se aplican el respaldo completo y los deltas creados hasta ese momento
+    # resume: retoma los checkpoints de una restauracion anterior del mismo respaldo; el mismo trabajo
+    # (reencolado tras un reinicio) siempre retoma los suyos
+    def restore_tables(self, tables, resume=False, until=None):
+        until = datetime.fromisoformat(until) if isinstance(until, str) else until
+        if until is not None and until.tzinfo is None:
+            until = until.replace(tzinfo=timezone.utc)
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="restore") as executor:
+            for stage_tables in restore_stages(tables):
+                futures = {}
+                started = {}
+                for table_name in stage_tables:
+                    try:
+                        parts, total_rows = self._part_blobs(table_name, until)
+                        if self.progress is not None:
+                            self.progress.set_total(table_name, total_rows)
+                        futures[table_name] = [executor.submit(contextvars.copy_context().run, self._restore_part, table_name, part, resume) for part in parts]
+                        started[table_name] = time.perf_counter()
+                    except Exception as e:
+                        logging.error(f"Error in restoring table {table_name}: {str(e)}")
+                        results[table_name] = {"status": "error", "message": str(e)}
+
+                for table_name, part_futures in futures.items():
+                    results[table_name] = self._collect_restore(table_name, part_futures, started[table_name])
+
+        return [results[table_name] for table_name in tables]
+
+    def _collect_restore(self, table_name, part_futures, started):
+        errors = []
+        rows = 0
+        size = 0
+        for future in part_futures:
+            try:
+                part_rows, part_bytes = future.result()
+                rows += part_rows
+                size += part_bytes
+            except Exception as e:
+                errors.append(str(e))
+
+        if table_name in REFERENCE_TABLES:
+            reference_cache.invalidate(table_name)
+        if (rows or errors) and not key_is_restored(table_name):
+            self._require_full_backup(table_name)
+        if rows and table_name == "HiredEmployees" and aggregates_enabled():
+            HireAggregates().rebuild()
+        if rows:
+            reporting_cache.invalidate()
+
+        if errors:
+            logging.error(f"Error in restoring table {table_name}: {'; '.join(errors)}")
+            return {"status": "error", "message": "; ".join(errors), "rows": rows}
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        _log_throughput("Restore", table_name, rows, size, elapsed)
+        return {
+            "status": "success",
+            "message": f"Restore for table {table_name} completed.",
+            "rows": rows,
+            "parts": len(part_futures),
+            "rowsPerSecond": round(rows / elapsed)
+        }
+
+    # Las filas restauradas tienen claves nuevas: la marca de agua de la cadena ya no separa lo respaldado
+    def _require_full_backup(self, table_name):
+        blob_name = chain_blob_name(table_name)
+        backup_chain = read_json_blob(self.blob_service_client, self.container_name, blob_name)
+        if backup_chain is not None and not backup_chain.get("fullRequired"):
+            backup_chain["fullRequired"] = True
+            write_json_blob(self.blob_service_client, self.container_name, blob_name, backup_chain)
+
+    # Partes a restaurar (blob y checksum) y filas esperadas: la cadena (completo + deltas), el manifest,
+    # o el respaldo antiguo de un solo archivo
+    def _part_blobs(self, table_name, until=None):
+        backup_chain = read_json_blob(self.blob_service_client, self.container_name, chain_blob_name(table_name))
+        if backup_chain is not None:
+            entries = [
+                entry for entry in backup_chain["entries"]
+                if until is None or datetime.fromisoformat(entry["createdAt"]) <= until
+            ]
+            if not entries:
+                raise ValueError(f"No backup of table {table_name} exists before {until.isoformat()}.")
+            manifests = [entry["manifest"] for entry in entries]
+        else:
+            manifests = [manifest_blob_name(full_prefix(table_name))]
+
+        parts = []
+        total_rows = 0
+        for blob_name in manifests:
+            manifest = read_json_blob(self.blob_service_client, self.container_name, blob_name)
+            if manifest is None:
+                if backup_chain is not None:
+                    raise ValueError(f"Backup manifest {blob_name} of table {table_name} is missing.")
+                return [{"blob": f"{table_name}_backup.avro"}], None
+            # createdAt identifica el respaldo en los checkpoints (los nombres de las partes se repiten)
+            parts.extend(dict(part, createdAt=manifest["createdAt"]) for part in manifest["parts"])
+            total_rows += manifest["rowCount"]
+        return parts, total_rows
+
+    def _restore_part(self, table_name, part, resume=False):
+        statement, fields = RESTORE_STATEMENTS[table_name]
+        blob_name = part["blob"]
+        checkpoint_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=checkpoint_blob_name(blob_name))
+        checkpoint_key = {
+            "sha256": part.get("sha256"),
+            "createdAt": part.get("createdAt"),
+            "jobId": self.progress.job_id if self.progress is not None else None
+        }
+        committed = self._read_checkpoint(checkpoint_client, checkpoint_key, resume)
+        skipped = committed
+        if committed:
+            logging.info(f"Resuming restore of {blob_name} after {committed} committed rows.")
+        if self.progress is not None:
+            self.progress.advance(table_name, rows=committed)
+
+        with stage("connect"):
+            connection = self.db_connection.connect()
         cursor = connection.cursor()
+        identity_insert = False
 
         try:
-            # Descargar el archivo AVRO desde Blob Storage
-            blob_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=f"{table_name}_backup.avro")
-            avro_data = blob_client.download_blob().readall()
-
-            # Leer los datos desde el archivo AVRO
-            avro_buffer = BytesIO(avro_data)
-            avro_reader = reader(avro_buffer)
+            # El blob se descarga por partes; el formato (AVRO, Parquet o Arrow) se detecta por sus primeros bytes
+            blob_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=blob_name)
+            blob_stream = BlobStreamReader(blob_client.download_blob())
 
             # Activar IDENTITY_INSERT si es necesario
             if table_name in ["Departments", "Jobs"]:
                 cursor.execute(f"SET IDENTITY_INSERT GlobantPoc.{table_name} ON")
+                identity_insert = True
 
-            # Insertar datos en la tabla correspondiente
-            for record in avro_reader:
-                if table_name == "HiredEmployees":
-                    cursor.execute(
-                        "INSERT INTO GlobantPoc.HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
-                        record["FirstName"], record["LastName"], record["HireDate"], record["JobID"], record["DepartmentID"]
-                    )
-                elif table_name == "Departments":
-                    cursor.execute(
-                        "INSERT INTO GlobantPoc.Departments (DepartmentID, DepartmentName) VALUES (?, ?)",
-                        record["DepartmentID"], record["DepartmentName"]
-                    )
-                elif table_name == "Jobs":
-                    cursor.execute(
-                        "INSERT INTO GlobantPoc.Jobs (JobID, JobTitle) VALUES (?, ?)",
-                        record["JobID"], record["JobTitle"]
-                    )
+            cursor.fast_executemany = True
+            position = 0
+            pending = 0
+            reported_bytes = 0
+            for batch in read_batches(blob_stream, fields, self.batch_size):
+                # Filas ya confirmadas en una restauracion anterior
+                if position + len(batch) <= committed:
+                    position += len(batch)
+                    continue
+                if position < committed:
+                    batch = batch[committed - position:]
+                    position = committed
 
-            # Desactivar IDENTITY_INSERT
-            if table_name in ["Departments", "Jobs"]:
-                cursor.execute(f"SET IDENTITY_INSERT GlobantPoc.{table_name} OFF")
+                with stage("restore_insert"):
+                    cursor.executemany(statement, batch)
+                position += len(batch)
+                pending += len(batch)
+                reported_bytes = self._report_progress(table_name, len(batch), blob_stream, reported_bytes)
+                if pending >= self.commit_interval:
+                    with stage("restore_commit"):
+                        connection.commit()
+                    committed, pending = position, 0
+                    self._write_checkpoint(checkpoint_client, checkpoint_key, committed)
+
+            # El checksum cubre el blob completo: se descarga lo que el lector no haya consumido
+            blob_stream.read()
+            if part.get("sha256") and blob_stream.sha256 != part["sha256"]:
+                raise ValueError(f"Checksum mismatch for {blob_name}: the backup file is corrupted.")
+
+            with stage("restore_commit"):
+                connection.commit()
+            self._delete_checkpoint(checkpoint_client)
+            logging.info(f"Restore of {blob_name} completed: {position - skipped} rows.")
+            return position - skipped, blob_stream.bytes_read
 
-            connection.commit()
-            logging.info(f"Restore for table {table_name} completed.")
-            return {"status": "success", "message": f"Restore for table {table_name} completed."}
-        
-        except Exception as e:
-            logging.error(f"Error in restoring table {table_name}: {str(e)}")
-            return {"status": "error", "message": str(e)}
-        
         finally:
+            # IDENTITY_INSERT es de la sesion y rollback no lo desactiva: la conexion vuelve al pool sin el,
+            # tambien si la restauracion fallo o fue cancelada; si no se puede desactivar, el pool la descarta
+            if identity_insert:
+                try:
+                    cursor.execute(f"SET IDENTITY_INSERT GlobantPoc.{table_name} OFF")
+                except Exception as e:
+                    logging.warning(f"Could not turn IDENTITY_INSERT off for {table_name}, discarding the connection: {str(e)}")
+                    connection.broken = True
             cursor.close()
             connection.close()
 
-    def restore_all_tables(self):
-        results = []
-        for table in self.tables:
-            result = self.restore_table(table)
-            results.append(result)
-        return results
\ No newline at end of file
+    # Informa filas y bytes descargados desde el ultimo lote; si el trabajo fue cancelado lanza JobCancelled
+    def _report_progress(self, table_name, rows, blob_stream, reported_bytes):
+        if self.progress is not None:
+            self.progress.advance(table_name, rows=rows, size=blob_stream.bytes_read - reported_bytes)
+        return blob_stream.bytes_read
+
+    # Ultima fila confirmada de una restauracion anterior que fallo. Solo vale si es del mismo respaldo
+    # (sha256 de la parte y createdAt del manifest) y, salvo resume, del mismo trabajo
+    @staticmethod
+    def _read_checkpoint(checkpoint_client, checkpoint_key, resume):
+        try:
+            checkpoint = json.loads(checkpoint_client.download_blob().readall())
+        except ResourceNotFoundError:
+            return 0
+        if any(checkpoint.get(key) != checkpoint_key[key] for key in ("sha256", "createdAt")):
+            logging.info(f"Ignoring checkpoint of {checkpoint_client.blob_name}: it belongs to another backup.")
+            return 0
+        same_job = checkpoint_key["jobId"] is not None and checkpoint.get("jobId") == checkpoint_key["jobId"]
+        return checkpoint["rows"] if same_job or resume else 0
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_client, checkpoint_key, rows):
+        checkpoint = dict(checkpoint_key, rows=rows, updatedAt=datetime.now(timezone.utc).isoformat())
+        checkpoint_client.upload_blob(json.dumps(checkpoint).encode("utf-8"), overwrite=True)
+
+    @staticmethod
+    def _delete_checkpoint(checkpoint_client):
+        try:
+            checkpoint_client.delete_blob()
+        except ResourceNotFoundError:
+            pass
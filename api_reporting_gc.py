@@ -1,46 +1,291 @@
+import base64
+import json
+import logging
+import os
+from datetime import MAXYEAR, datetime
 from fastapi import HTTPException
+from api_transactional_gc import MAX_QUERY_PARAMETERS
 from database_connection import DatabaseConnection
+from hire_aggregates import AGGREGATE_REPORT_PARAMS, AGGREGATE_REPORTS, AGGREGATE_TABLE, REPORTING_YEAR, aggregates_enabled
+
+# Vista y orden de cada reporte; el orden tambien define la clave de paginacion (keyset)
+REPORTS = {
+    "EmployeeHiresByQuarter": {
+        "view": "GlobantPoc.VW_HiresByDepartmentJobQuarter",
+        "keys": [("Department", "ASC"), ("Job", "ASC")]
+    },
+    "DepartmentsAboveAverage": {
+        "view": "GlobantPoc.VW_DepartmentsAboveAverageHires",
+        "keys": [("hired", "DESC"), ("id", "ASC")]
+    }
+}
+
+STREAM_FETCH_SIZE = int(os.getenv("REPORTING_STREAM_FETCH_SIZE", "1000"))
+
+# Indices que usan los reportes filtrados: rango de HireDate y luego departamento/puesto, sin leer la tabla
+REPORTING_INDEXES = {
+    "IX_HiredEmployees_HireDate_DepartmentID_JobID":
+        "CREATE INDEX IX_HiredEmployees_HireDate_DepartmentID_JobID ON GlobantPoc.HiredEmployees (HireDate, DepartmentID, JobID);"
+}
+
+# Origen de los reportes filtrados: la tabla base, o la de agregados si esta habilitada
+FILTER_SOURCES = {
+    "base": {"table": "GlobantPoc.HiredEmployees", "hires": "1", "quarter": "DATEPART(QUARTER, HireDate)"},
+    "aggregates": {"table": AGGREGATE_TABLE, "hires": "Hires", "quarter": "HireQuarter"}
+}
+
+
+# Cada ID de department/job es un parametro y DepartmentsAboveAverage repite el predicado dos veces:
+# con este limite por lista la consulta queda bajo MAX_QUERY_PARAMETERS (fechas, top y cursor incluidos)
+MAX_FILTER_IDS = MAX_QUERY_PARAMETERS // 4
+
+# Filtros de los reportes; None si no hay ninguno (se usa la vista tal cual)
+def report_filters(year=None, departments=None, jobs=None, quarter_from=None, quarter_to=None, top=None):
+    if quarter_from is not None and quarter_to is not None and quarter_from > quarter_to:
+        raise HTTPException(status_code=400, detail="quarterFrom must not be greater than quarterTo.")
+    for name, values in (("department", departments), ("job", jobs)):
+        if values and len(set(values)) > MAX_FILTER_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_FILTER_IDS} {name} values are allowed.")
+    filters = {
+        "year": year,
+        "departments": sorted(set(departments)) if departments else None,
+        "jobs": sorted(set(jobs)) if jobs else None,
+        "quarterFrom": quarter_from,
+        "quarterTo": quarter_to,
+        "top": top
+    }
+    if all(value is None for value in filters.values()):
+        return None
+    return filters
+
+
+# WHERE sobre columnas sin funciones, para que el motor use los indices (rango de fechas en vez de YEAR())
+def filter_predicate(filters, source):
+    year = filters["year"] or REPORTING_YEAR
+    quarter_from = filters["quarterFrom"] or 1
+    quarter_to = filters["quarterTo"] or 4
+    if source == "aggregates":
+        clauses = ["HireYear = ?", "HireQuarter BETWEEN ? AND ?"]
+        params = [year, quarter_from, quarter_to]
+    else:
+        clauses = ["HireDate >= ?"]
+        params = [datetime(year, 3 * quarter_from - 2, 1)]
+        # El ultimo trimestre de MAXYEAR no tiene limite superior (datetime(10000, 1, 1) no existe)
+        if quarter_to < 4 or year < MAXYEAR:
+            clauses.append("HireDate < ?")
+            params.append(datetime(year + 1, 1, 1) if quarter_to == 4 else datetime(year, 3 * quarter_to + 1, 1))
+    for column, values in (("DepartmentID", filters["departments"]), ("JobID", filters["jobs"])):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+
+# Mismas columnas que las vistas (solo los trimestres pedidos), agrupando por IDs antes de unir los nombres
+def filtered_report(report, filters):
+    source = "aggregates" if aggregates_enabled() else "base"
+    table, hires, quarter = (FILTER_SOURCES[source][key] for key in ("table", "hires", "quarter"))
+    predicate, params = filter_predicate(filters, source)
+    top = ""
+    top_params = []
+    if filters["top"] is not None:
+        top = "OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+        top_params = [filters["top"]]
+
+    if report == "EmployeeHiresByQuarter":
+        quarters = range(filters["quarterFrom"] or 1, (filters["quarterTo"] or 4) + 1)
+        sums = ", ".join(f"SUM(CASE WHEN {quarter} = {number} THEN {hires} ELSE 0 END) AS Q{number}" for number in quarters)
+        columns = ", ".join(f"h.Q{number}" for number in quarters)
+        total = " + ".join(f"h.Q{number}" for number in quarters)
+        query = f"""
+            SELECT d.DepartmentName AS Department, j.JobTitle AS Job, {columns}
+            FROM (
+                SELECT DepartmentID, JobID, {sums}
+                FROM {table}
+                WHERE {predicate}
+                GROUP BY DepartmentID, JobID
+            ) h
+            JOIN GlobantPoc.Departments d ON d.DepartmentID = h.DepartmentID
+            JOIN GlobantPoc.Jobs j ON j.JobID = h.JobID
+            {f"ORDER BY {total} DESC, d.DepartmentName, j.JobTitle {top}" if top else ""}
+        """
+        return f"({query}) AS report", params + top_params
+
+    query = f"""
+        SELECT d.DepartmentID AS id, d.DepartmentName AS department, h.hired
+        FROM (
+            SELECT DepartmentID, SUM({hires}) AS hired
+            FROM {table}
+            WHERE {predicate}
+            GROUP BY DepartmentID
+        ) h
+        JOIN GlobantPoc.Departments d ON d.DepartmentID = h.DepartmentID
+        WHERE h.hired > (
+            SELECT AVG(CAST(hired AS FLOAT)) FROM (
+                SELECT SUM({hires}) AS hired
+                FROM {table}
+                WHERE {predicate}
+                GROUP BY DepartmentID
+            ) per_department
+        )
+        {f"ORDER BY h.hired DESC, d.DepartmentID {top}" if top else ""}
+    """
+    return f"({query}) AS report", params + params + top_params
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode("utf-8")).decode("ascii")
+
+
+# Un cursor valido trae un valor simple por cada columna de orden del reporte
+def decode_cursor(cursor, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if any(isinstance(value, bool) or not isinstance(value, (str, int, float)) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+# WHERE para continuar despues de la ultima fila entregada, p. ej. (a > ?) OR (a = ? AND b > ?)
+def keyset_predicate(keys, values):
+    clauses = []
+    params = []
+    for position, (column, direction) in enumerate(keys):
+        operator = ">" if direction == "ASC" else "<"
+        equals = [f"{previous} = ?" for previous, _ in keys[:position]]
+        clauses.append("(" + " AND ".join(equals + [f"{column} {operator} ?"]) + ")")
+        params.extend(values[:position] + [values[position]])
+    return " OR ".join(clauses), params
+
 
 class APIReportingGC:
     def __init__(self):
         self.db_connection = DatabaseConnection()
 
-    def get_employee_hires_by_quarter(self):
-        
-        query = """
-            SELECT *
-            FROM GlobantPoc.VW_HiresByDepartmentJobQuarter
-            ORDER BY Department, Job;
-        """
+    def get_employee_hires_by_quarter(self, limit=None, cursor=None, filters=None):
+        return self._get_report("EmployeeHiresByQuarter", limit, cursor, filters)
+
+    def get_departments_above_average_hires(self, limit=None, cursor=None, filters=None):
+        return self._get_report("DepartmentsAboveAverage", limit, cursor, filters)
+
+    def stream_employee_hires_by_quarter(self, filters=None):
+        return self._stream_report("EmployeeHiresByQuarter", filters)
+
+    def stream_departments_above_average_hires(self, filters=None):
+        return self._stream_report("DepartmentsAboveAverage", filters)
+
+    # Crea los indices de REPORTING_INDEXES que falten
+    def ensure_indexes(self):
         connection = self.db_connection.connect()
         cursor = connection.cursor()
+        created = []
+        existing = []
         try:
-            cursor.execute(query)
-            columns = [column[0] for column in cursor.description]
-            result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            return result
+            for name, ddl in REPORTING_INDEXES.items():
+                cursor.execute(
+                    "SELECT 1 FROM sys.indexes WHERE name = ? AND object_id = OBJECT_ID('GlobantPoc.HiredEmployees')", name
+                )
+                if cursor.fetchone() is not None:
+                    existing.append(name)
+                    continue
+                cursor.execute(ddl)
+                connection.commit()
+                created.append(name)
+            logging.info(f"Reporting indexes created: {created}, already present: {existing}.")
+            return {"status": "success", "created": created, "existing": existing}
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            connection.rollback()
+            logging.error(f"Error creating reporting indexes: {str(e)}")
+            return {"status": "error", "message": str(e), "created": created, "ddl": list(REPORTING_INDEXES.values())}
         finally:
             cursor.close()
             connection.close()
 
-    def get_departments_above_average_hires(self):
-       
-        query = """
-            SELECT *
-            FROM GlobantPoc.VW_DepartmentsAboveAverageHires
-            ORDER BY hired DESC;
+    # Con filtros se consulta la tabla base (o la de agregados); sin filtros, la vista o los agregados
+    def _source(self, report, filters=None):
+        if filters is not None:
+            return filtered_report(report, filters)
+        if aggregates_enabled():
+            return f"({AGGREGATE_REPORTS[report]}) AS report", list(AGGREGATE_REPORT_PARAMS[report])
+        return REPORTS[report]["view"], []
+
+    def _build_query(self, report, limit=None, cursor=None, filters=None):
+        keys = REPORTS[report]["keys"]
+        source, source_params = self._source(report, filters)
+        params = []
+        top = ""
+        where = ""
+        if limit is not None:
+            top = "TOP (?) "
+            params.append(limit)
+        params.extend(source_params)
+        if cursor is not None:
+            predicate, predicate_params = keyset_predicate(keys, decode_cursor(cursor, keys))
+            where = f"WHERE {predicate}"
+            params.extend(predicate_params)
+        order_by = ", ".join(f"{column} {direction}" for column, direction in keys)
+
+        query = f"""
+            SELECT {top}*
+            FROM {source}
+            {where}
+            ORDER BY {order_by};
         """
+        return query, params
+
+    # Sin limit devuelve la lista completa; con limit devuelve una pagina y el cursor de la siguiente
+    def _get_report(self, report, limit=None, cursor=None, filters=None):
+        query, params = self._build_query(report, limit, cursor, filters)
         connection = self.db_connection.connect()
-        cursor = connection.cursor()
+        db_cursor = connection.cursor()
         try:
-            cursor.execute(query)
-            columns = [column[0] for column in cursor.description]
-            result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            return result
+            db_cursor.execute(query, *params)
+            columns = [column[0] for column in db_cursor.description]
+            result = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+            if limit is None:
+                return result
+
+            next_cursor = None
+            if len(result) == limit:
+                next_cursor = encode_cursor([result[-1][column] for column, _ in REPORTS[report]["keys"]])
+            return {"items": result, "nextCursor": next_cursor}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         finally:
-            cursor.close()
+            db_cursor.close()
+            connection.close()
+
+    # Genera el arreglo JSON a medida que se leen las filas con fetchmany
+    def _stream_report(self, report, filters=None):
+        query, params = self._build_query(report, filters=filters)
+        connection = self.db_connection.connect()
+        db_cursor = connection.cursor()
+        try:
+            db_cursor.execute(query, *params)
+            columns = [column[0] for column in db_cursor.description]
+        except Exception as e:
+            db_cursor.close()
             connection.close()
+            raise HTTPException(status_code=500, detail=str(e))
+
+        def rows():
+            try:
+                separator = "["
+                while True:
+                    batch = db_cursor.fetchmany(STREAM_FETCH_SIZE)
+                    if not batch:
+                        break
+                    yield separator + ",".join(json.dumps(dict(zip(columns, row)), default=str) for row in batch)
+                    separator = ","
+                yield "[]" if separator == "[" else "]"
+            finally:
+                db_cursor.close()
+                connection.close()
+
+        return rows()
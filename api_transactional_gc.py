@@ -1,8 +1,52 @@
 import logging
 #import pyodbc
 import json
+import os
+import threading
+import time
 from fastapi import HTTPException
 from database_connection import DatabaseConnection
+from result_cache import reporting_cache
+from hire_aggregates import apply_hires
+from transaction_log import INSERT_TRANSACTION_LOG, async_logging_enabled, transaction_log_writer
+
+# Tablas referenciadas por HiredEmployees y su columna clave
+REFERENCE_TABLES = {
+    "Departments": "DepartmentID",
+    "Jobs": "JobID"
+}
+
+# SQL Server admite hasta 2100 parametros por consulta
+MAX_QUERY_PARAMETERS = 2000
+
+# Cache a nivel de proceso de los IDs que se sabe que existen
+class ReferenceCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._known = {table: {} for table in REFERENCE_TABLES}
+        self._lock = threading.Lock()
+
+    def known(self, table, ids):
+        now = time.monotonic()
+        with self._lock:
+            entries = self._known[table]
+            return {value for value in ids if entries.get(value, 0) > now}
+
+    def add(self, table, ids):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            entries = self._known[table]
+            for value in ids:
+                entries[value] = expires
+
+    def invalidate(self, table=None):
+        with self._lock:
+            for name in ([table] if table else list(self._known)):
+                self._known[name].clear()
+
+
+reference_cache = ReferenceCache(int(os.getenv("REFERENCE_CACHE_TTL", "300")))
+
 
 # Validar transacciones
 class DataValidator:
@@ -11,34 +55,55 @@ class DataValidator:
         self.cursor = self.connection.cursor()
 
     def validate_hired_employee(self, transaction):
-        required_fields = ["FirstName", "LastName", "HireDate", "JobID", "DepartmentID"]
-        for field in required_fields:
-            if field not in transaction or transaction[field] is None:
-                return False, f"{field} is missing or null."
+        return self.validate_hired_employees([transaction])[0]
 
-        # Validar que el department_id exista en Departments
-        self.cursor.execute("SELECT COUNT(*) FROM GlobantPoc.Departments WHERE DepartmentID = ?", transaction["DepartmentID"])
-        if self.cursor.fetchone()[0] == 0:
-            return False, "DepartmentID does not exist in Departments."
+    # La validacion la hace el motor de ingesta; se importa aqui porque ingestion depende de este modulo
+    def validate_hired_employees(self, transactions):
+        from ingestion import validate_batch
+        return validate_batch("HiredEmployees", transactions, self.existing_ids)[0]
 
-        # Validar que el job_id exista en Jobs
-        self.cursor.execute("SELECT COUNT(*) FROM GlobantPoc.Jobs WHERE JobID = ?", transaction["JobID"])
-        if self.cursor.fetchone()[0] == 0:
-            return False, "JobID does not exist in Jobs."
+    def existing_ids(self, table, ids):
+        ids = {value for value in ids if value is not None}
+        existing = reference_cache.known(table, ids)
+        missing = list(ids - existing)
+        key_column = REFERENCE_TABLES[table]
 
-        return True, None   
+        for start in range(0, len(missing), MAX_QUERY_PARAMETERS):
+            chunk = missing[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(f"SELECT {key_column} FROM GlobantPoc.{table} WHERE {key_column} IN ({placeholders})", *chunk)
+            found = [row[0] for row in self.cursor.fetchall()]
+            reference_cache.add(table, found)
+            existing.update(found)
+        return existing
 
     @staticmethod
     def validate_department(data):
-        if "DepartmentName" not in data or data["DepartmentName"] is None:
-            return False, "DepartmentName is missing or null."
-        return True, None
+        from ingestion import validate_batch
+        return validate_batch("Departments", [data], None)[0][0]
 
     @staticmethod
     def validate_job(data):
-        if "JobTitle" not in data or data["JobTitle"] is None:
-            return False, "JobTitle is missing or null."
-        return True, None
+        from ingestion import validate_batch
+        return validate_batch("Jobs", [data], None)[0][0]
+
+# Sentencias y columnas usadas por la carga masiva
+INSERT_STATEMENTS = {
+    "HiredEmployees": (
+        "INSERT INTO GlobantPoc.HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
+        ["FirstName", "LastName", "HireDate", "JobID", "DepartmentID"]
+    ),
+    "Departments": (
+        "INSERT INTO GlobantPoc.Departments (DepartmentName) VALUES (?)",
+        ["DepartmentName"]
+    ),
+    "Jobs": (
+        "INSERT INTO GlobantPoc.Jobs (JobTitle) VALUES (?)",
+        ["JobTitle"]
+    )
+}
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("INSERT_CHUNK_SIZE", "1000"))
 
 # Insertar en BD
 class DataInserter:
@@ -56,40 +121,91 @@ class DataInserter:
                 employee["JobID"],
                 employee["DepartmentID"]
             )
+            apply_hires(self.cursor, [employee])
             self.connection.commit() 
+            reporting_cache.invalidate()
             return True, None 
         except Exception as e:
+            # Sin rollback, lo que alcanzo a ejecutarse se confirmaria con el siguiente commit de la conexion
+            self.connection.rollback()
             logging.error(f"Error inserting employee: {str(e)}")
             return False, str(e)
 
     def insert_department(self, department):
         try:
             self.cursor.execute(
-                "INSERT INTO GlobantPoc.Departments (DepartmentName) VALUES (?)",
+                "INSERT INTO GlobantPoc.Departments (DepartmentName) OUTPUT INSERTED.DepartmentID VALUES (?)",
                 department["DepartmentName"]
             )
-            self.connection.commit() 
+            department_id = self.cursor.fetchone()[0]
+            self.connection.commit()
+            reference_cache.add("Departments", [department_id])
+            reporting_cache.invalidate()
             return True, None
         except Exception as e:
+            self.connection.rollback()
             logging.error(f"Error inserting department: {str(e)}")
             return False, str(e)
 
     def insert_job(self, job):
         try:
             self.cursor.execute(
-                "INSERT INTO GlobantPoc.Jobs (JobTitle) VALUES (?)",
+                "INSERT INTO GlobantPoc.Jobs (JobTitle) OUTPUT INSERTED.JobID VALUES (?)",
                 job["JobTitle"]
             )
-            self.connection.commit() 
+            job_id = self.cursor.fetchone()[0]
+            self.connection.commit()
+            reference_cache.add("Jobs", [job_id])
+            reporting_cache.invalidate()
             return True, None
         except Exception as e:
+            self.connection.rollback()
             logging.error(f"Error inserting job: {str(e)}")
             return False, str(e)
 
+    def insert_batch(self, transaction_type, transactions, chunk_size=DEFAULT_CHUNK_SIZE):
+        statement, fields = INSERT_STATEMENTS[transaction_type]
+        results = []
+        for start in range(0, len(transactions), chunk_size):
+            chunk = transactions[start:start + chunk_size]
+            results.extend(self._insert_chunk(transaction_type, statement, fields, chunk))
+        return results
+
+    def _insert_chunk(self, transaction_type, statement, fields, chunk):
+        # Una transaccion por chunk
+        try:
+            self.cursor.fast_executemany = True
+            self.cursor.executemany(statement, [tuple(row[field] for field in fields) for row in chunk])
+            if transaction_type == "HiredEmployees":
+                apply_hires(self.cursor, chunk)
+            self.connection.commit()
+            reporting_cache.invalidate()
+            return [(True, None)] * len(chunk)
+        except Exception as e:
+            self.connection.rollback()
+            logging.warning(f"Bulk insert of {len(chunk)} {transaction_type} rows failed, retrying row by row: {str(e)}")
+        finally:
+            self.cursor.fast_executemany = False
+
+        # Si la BD rechaza alguna fila se reintenta el chunk fila por fila para aislarla
+        insert_row = {
+            "HiredEmployees": self.insert_hired_employee,
+            "Departments": self.insert_department,
+            "Jobs": self.insert_job
+        }[transaction_type]
+        results = []
+        for row in chunk:
+            results.append(insert_row(row))
+        return results
+
+    # Por defecto se encola al escritor en segundo plano; TRANSACTION_LOG_ASYNC=false escribe en linea
     def log_transaction_error(self, transaction_type, transaction_data, error_message):
+        if async_logging_enabled():
+            transaction_log_writer.log(transaction_type, transaction_data, error_message)
+            return
         try:
             self.cursor.execute(
-                "INSERT INTO GlobantPoc.TransactionLogs (TransactionType, TransactionData, ErrorMessage) VALUES (?, ?, ?)",
+                INSERT_TRANSACTION_LOG,
                 transaction_type,
                 json.dumps(transaction_data),
                 error_message
@@ -122,47 +238,31 @@ class API_Transactional_GC:
     def __init__(self):
         self.db_connection = DatabaseConnection()
 
-    def process_batch(self, transactions, transaction_type):
-        connection = self.db_connection.connect()
-        data_inserter = DataInserter(connection)
+    # mode="row" hace commit por fila; mode="parallel" reparte el lote en shards con su propia conexion
+    def process_batch(self, transactions, transaction_type, mode="row"):
+        from ingestion import IngestionEngine, ingest_sharded
         error_logger = ErrorLogger()
 
-        successful_inserts = 0
-
-        for transaction in transactions:
-            if transaction_type == "HiredEmployees":
-                is_valid, error_message = DataValidator(connection).validate_hired_employee(transaction)
-                if not is_valid:
-                    error_logger.log_error(transaction, error_message)
-                    continue
-                success, insert_error = data_inserter.insert_hired_employee(transaction)
-            elif transaction_type == "Departments":
-                is_valid, error_message = DataValidator.validate_department(transaction)
-                if not is_valid:
-                    error_logger.log_error(transaction, error_message)
-                    continue
-                success, insert_error = data_inserter.insert_department(transaction)
-            elif transaction_type == "Jobs":
-                is_valid, error_message = DataValidator.validate_job(transaction)
-                if not is_valid:
-                    error_logger.log_error(transaction, error_message)
-                    continue
-                success, insert_error = data_inserter.insert_job(transaction)
-            else:
-                error_logger.log_error(transaction, "Invalid transaction type.")
-                continue
+        if mode == "parallel":
+            results = ingest_sharded(self.db_connection.connect, transaction_type, transactions)
+        else:
+            connection = self.db_connection.connect()
+            engine = IngestionEngine(connection)
+            # La validacion es una sola pasada por columnas sobre el lote
+            results = engine.ingest(transaction_type, transactions, mode="row")
+            engine.data_inserter.commit()
+            engine.data_inserter.close()
 
+        successful_inserts = 0
+        for transaction, (success, error_message) in zip(transactions, results):
             if success:
                 successful_inserts += 1
             else:
-                error_logger.log_error(transaction, insert_error)
-
-        data_inserter.commit()
-        data_inserter.close()
+                error_logger.log_error(transaction, error_message)
 
         response = {
             "successCount": successful_inserts,
             "failureCount": len(error_logger.get_errors()),
             "errors": error_logger.get_errors()
         }
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,141 @@
+import importlib
+import io
+import os
+from fastavro import reader, writer
+
+# Formatos de respaldo: AVRO por filas, o Parquet / Arrow IPC por columnas (requieren pyarrow)
+FORMATS = ("avro", "parquet", "arrow")
+
+DEFAULT_CODECS = {
+    "avro": "deflate",
+    "parquet": "snappy",
+    "arrow": "zstd"
+}
+
+# Nombre del codec en cada libreria; snappy y zstd de AVRO dependen de paquetes opcionales de fastavro
+AVRO_CODECS = {"none": "null", "deflate": "deflate", "snappy": "snappy", "zstd": "zstandard"}
+PARQUET_CODECS = {"none": "none", "snappy": "snappy", "gzip": "gzip", "zstd": "zstd", "lz4": "lz4"}
+ARROW_CODECS = {"none": None, "lz4": "lz4", "zstd": "zstd"}
+
+AVRO_MAGIC = b"Obj\x01"
+PARQUET_MAGIC = b"PAR1"
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+
+ARROW_TYPES = {"string": "string", "int": "int32", "long": "int64", "double": "float64", "boolean": "bool_"}
+
+
+def backup_format():
+    return os.getenv("BACKUP_FORMAT", "avro").lower()
+
+
+# BACKUP_CODEC acompana a BACKUP_FORMAT; otro formato (pedido en la peticion) usa su codec por defecto
+def backup_codec(format_name):
+    if format_name == backup_format():
+        return os.getenv("BACKUP_CODEC", DEFAULT_CODECS.get(format_name, "none")).lower()
+    return DEFAULT_CODECS.get(format_name, "none")
+
+
+def _require(package, feature):
+    try:
+        return importlib.import_module(package)
+    except ImportError:
+        raise ValueError(f"{feature} requires the optional package {package}.")
+
+
+# Valida la combinacion formato/codec antes de empezar a exportar
+def check_format(format_name, codec):
+    if format_name not in FORMATS:
+        raise ValueError(f"Unknown backup format {format_name}. Use one of: {', '.join(FORMATS)}.")
+    codecs = {"avro": AVRO_CODECS, "parquet": PARQUET_CODECS, "arrow": ARROW_CODECS}[format_name]
+    if codec not in codecs:
+        raise ValueError(f"Codec {codec} is not supported for {format_name}. Use one of: {', '.join(codecs)}.")
+    if format_name == "avro":
+        # fastavro solo avisa que falta la libreria del codec al comprimir el primer bloque
+        schema = {"name": "Check", "type": "record", "fields": [{"name": "value", "type": "int"}]}
+        try:
+            writer(io.BytesIO(), schema, [{"value": 0}], codec=AVRO_CODECS[codec])
+        except Exception as e:
+            raise ValueError(f"AVRO codec {codec} is not available: {str(e)}")
+    else:
+        _require("pyarrow", f"Backup format {format_name}")
+
+
+def _field_names(avro_schema):
+    return [field["name"] for field in avro_schema["fields"]]
+
+
+def _arrow_schema(pa, avro_schema):
+    return pa.schema([
+        (field["name"], getattr(pa, ARROW_TYPES[field["type"]])()) for field in avro_schema["fields"]
+    ])
+
+
+# Convierte un lote de filas (tuplas en el orden del esquema) a un RecordBatch columna por columna
+def _record_batch(pa, arrow_schema, batch):
+    columns = list(zip(*batch))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, arrow_schema)],
+        schema=arrow_schema
+    )
+
+
+# Escribe lotes de filas (tuplas en el orden de los campos del esquema AVRO) en el formato elegido
+def write_batches(fileobj, format_name, codec, avro_schema, batches):
+    if format_name == "avro":
+        fields = _field_names(avro_schema)
+        records = (dict(zip(fields, row)) for batch in batches for row in batch)
+        writer(fileobj, avro_schema, records, codec=AVRO_CODECS[codec])
+        return
+
+    pa = _require("pyarrow", f"Backup format {format_name}")
+    arrow_schema = _arrow_schema(pa, avro_schema)
+    if format_name == "parquet":
+        import pyarrow.parquet as pq
+        with pq.ParquetWriter(fileobj, arrow_schema, compression=PARQUET_CODECS[codec]) as parquet_writer:
+            for batch in batches:
+                parquet_writer.write_batch(_record_batch(pa, arrow_schema, batch))
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=ARROW_CODECS[codec])
+        with pa.ipc.new_stream(fileobj, arrow_schema, options=options) as stream_writer:
+            for batch in batches:
+                stream_writer.write_batch(_record_batch(pa, arrow_schema, batch))
+
+
+# Reconoce el formato por los primeros bytes del archivo
+def detect_format(header):
+    if header.startswith(AVRO_MAGIC):
+        return "avro"
+    if header.startswith(PARQUET_MAGIC):
+        return "parquet"
+    if header.startswith(ARROW_STREAM_MAGIC):
+        return "arrow"
+    raise ValueError("Unrecognized backup file format.")
+
+
+# Lee un respaldo en cualquier formato y entrega lotes de tuplas con las columnas pedidas
+def read_batches(stream, fields, batch_size):
+    format_name = detect_format(stream.peek(len(AVRO_MAGIC)))
+    if format_name == "avro":
+        batch = []
+        for record in reader(stream):
+            batch.append(tuple(record[field] for field in fields))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+
+    pa = _require("pyarrow", f"Backup format {format_name}")
+    if format_name == "parquet":
+        # Parquet guarda los metadatos al final del archivo: se descarga completo antes de leer
+        import pyarrow.parquet as pq
+        record_batches = pq.ParquetFile(pa.BufferReader(stream.read())).iter_batches(batch_size=batch_size, columns=fields)
+    else:
+        record_batches = pa.ipc.open_stream(stream)
+
+    for record_batch in record_batches:
+        columns = [record_batch.column(record_batch.schema.get_field_index(field)).to_pylist() for field in fields]
+        rows = list(zip(*columns))
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
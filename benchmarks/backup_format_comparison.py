@@ -0,0 +1,99 @@
+# Compara tamano y velocidad de los formatos/codecs de respaldo sobre los reemplazos locales.
+# Las combinaciones cuyo paquete opcional no esta instalado (pyarrow, cramjam, zstandard) se omiten.
+#
+#   python benchmarks/backup_format_comparison.py --employees 200000
+#   python benchmarks/backup_format_comparison.py --formats avro:deflate,parquet:zstd --output formats.json
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+import standins
+
+COMBINATIONS = [
+    ("avro", "none"), ("avro", "deflate"), ("avro", "snappy"), ("avro", "zstd"),
+    ("parquet", "none"), ("parquet", "snappy"), ("parquet", "zstd"),
+    ("arrow", "none"), ("arrow", "lz4"), ("arrow", "zstd")
+]
+
+
+def run(args, workdir):
+    source_db = os.path.join(workdir, "source.db")
+    target_db = os.path.join(workdir, "target.db")
+    standins.install(source_db, os.path.join(workdir, "blobs"))
+    standins.create_database(source_db)
+    datagen.seed_database(source_db, args.employees)
+
+    from api_datamanagement_gc import DataBackup, DataRestore
+    from backup_formats import check_format
+
+    results = []
+    for format_name, codec in args.formats:
+        try:
+            check_format(format_name, codec)
+        except ValueError as e:
+            print(f"{format_name}:{codec:<8} skipped ({e})")
+            continue
+
+        standins.use_database(source_db)
+        start = time.perf_counter()
+        backup = DataBackup(format_name=format_name, codec=codec).backup_table("HiredEmployees")
+        backup_seconds = time.perf_counter() - start
+        if backup["status"] != "success":
+            raise RuntimeError(f"Backup {format_name}:{codec} failed: {backup['message']}")
+
+        standins.create_database(target_db)
+        datagen.seed_database(target_db, 0)
+        standins.use_database(target_db)
+        start = time.perf_counter()
+        restore = DataRestore().restore_table("HiredEmployees", resume=False)
+        restore_seconds = time.perf_counter() - start
+        if restore["status"] != "success":
+            raise RuntimeError(f"Restore {format_name}:{codec} failed: {restore['message']}")
+
+        result = {
+            "format": format_name,
+            "codec": codec,
+            "rows": backup["rows"],
+            "megabytes": round(backup["bytes"] / (1024 * 1024), 3),
+            "bytesPerRow": round(backup["bytes"] / max(backup["rows"], 1), 1),
+            "backupRowsPerSecond": round(backup["rows"] / backup_seconds),
+            "restoreRowsPerSecond": round(restore["rows"] / restore_seconds)
+        }
+        results.append(result)
+        print(f"{format_name}:{codec:<8} {json.dumps(result)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument(
+        "--formats", default=",".join(f"{name}:{codec}" for name, codec in COMBINATIONS),
+        type=lambda value: [tuple(item.split(":")) for item in value.split(",")]
+    )
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="globant-formats-") as workdir:
+        results = run(args, workdir)
+
+    if results:
+        smallest = min(results, key=lambda result: result["megabytes"])
+        print(f"\nSmallest: {smallest['format']}:{smallest['codec']}")
+        fastest = max(results, key=lambda result: result["backupRowsPerSecond"] + result["restoreRowsPerSecond"])
+        print("Fastest backup+restore:", f"{fastest['format']}:{fastest['codec']}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Muchas peticiones /InsertData pequenas y concurrentes, con y sin INSERT_COALESCE, sobre los reemplazos locales.
+# --commit-latency-ms simula el costo de ida y vuelta de cada COMMIT contra SQL Server.
+#
+#   python benchmarks/coalescing.py --clients 32 --requests 20 --rows 5
+#   python benchmarks/coalescing.py --commit-latency-ms 5 --max-wait-ms 10
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+import standins
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run(function_app, args, coalesce):
+    import httpx
+
+    batches = list(datagen.hired_employees(args.clients * args.requests * args.rows, 12, 183, seed=int(coalesce)))
+    latencies = []
+    failures = 0
+
+    async def client_loop(client, index):
+        nonlocal failures
+        for request in range(args.requests):
+            start_row = (index * args.requests + request) * args.rows
+            body = {
+                "transactionType": "HiredEmployees",
+                "transactions": batches[start_row:start_row + args.rows],
+                "mode": "bulk",
+                "coalesce": coalesce
+            }
+            start = time.perf_counter()
+            response = await client.post("/InsertData", json=body)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+            failures += response.json()["failureCount"]
+
+    transport = httpx.ASGITransport(app=function_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client, index) for index in range(args.clients)])
+        elapsed = time.perf_counter() - start
+
+    rows = args.clients * args.requests * args.rows
+    return {
+        "coalesce": coalesce,
+        "requests": len(latencies),
+        "rows": rows,
+        "failures": failures,
+        "rowsPerSecond": round(rows / elapsed),
+        "requestsPerSecond": round(len(latencies) / elapsed),
+        "p50Ms": round(statistics.median(latencies) * 1000, 2),
+        "p99Ms": round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--commit-latency-ms", type=float, default=5)
+    parser.add_argument("--max-rows", type=int, default=500)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="globant-coalescing-") as workdir:
+        os.environ["JOBS_DB_PATH"] = os.path.join(workdir, "jobs.db")
+        os.environ["TRANSACTION_LOG_ASYNC"] = "false"
+        database = os.path.join(workdir, "bench.db")
+        standins.create_database(database)
+        datagen.seed_database(database, 0)
+
+        import function_app
+        standins.install(database, os.path.join(workdir, "blobs"))
+        standins.SQLiteConnection.commit_latency = args.commit_latency_ms / 1000
+        function_app.write_coalescer.max_rows = args.max_rows
+        function_app.write_coalescer.max_wait = args.max_wait_ms / 1000
+
+        results = [asyncio.run(run(function_app, args, coalesce)) for coalesce in (False, True)]
+
+    print(json.dumps(results + [function_app.write_coalescer.stats()], indent=2))
+    direct, coalesced = results
+    print(f"Throughput x{coalesced['rowsPerSecond'] / direct['rowsPerSecond']:.2f}, "
+          f"p99 {direct['p99Ms']} ms -> {coalesced['p99Ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Mide si las peticiones concurrentes se atienden en paralelo o una tras otra.
+# Usa un APIReportingGC de reemplazo que bloquea como lo haria pyodbc.
+#
+#   python benchmarks/concurrency_latency.py --requests 8 --delay 0.2
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Evita la consulta a Key Vault al importar la app
+os.environ.setdefault("ENVIRONMENT", "AZURE")
+
+import httpx
+import function_app
+
+
+class BlockingReporting:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_employee_hires_by_quarter(self, limit=None, cursor=None, filters=None):
+        time.sleep(self.delay)
+        return [{"Department": "Staff", "Job": "Manager", "Q1": 0, "Q2": 1, "Q3": 0, "Q4": 0}]
+
+    def get_departments_above_average_hires(self, limit=None, cursor=None, filters=None):
+        time.sleep(self.delay)
+        return [{"id": 1, "department": "Staff", "hired": 45}]
+
+
+async def run(requests, delay):
+    function_app.reporting_api = BlockingReporting(delay)
+    function_app.reporting_cache.invalidate()
+    transport = httpx.ASGITransport(app=function_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        # Un limit distinto por peticion: con la misma clave la cache haria una sola carga y el resto esperaria
+        # su resultado, y el tiempo total no diria nada sobre si las consultas corren en paralelo
+        responses = await asyncio.gather(*[
+            client.get("/EmployeeHiresByQuarter", params={"limit": index + 1}) for index in range(requests)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    elapsed = asyncio.run(run(args.requests, args.delay))
+    serial = args.requests * args.delay
+    print(f"{args.requests} concurrent requests: {elapsed:.3f}s (serial would be {serial:.3f}s)")
+
+    # Con el event loop bloqueado el tiempo total se acerca al serial
+    if elapsed >= serial * 0.75:
+        print("FAIL: requests were handled one after another")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Datos sinteticos con los mismos campos que get_avro_schema
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ["Ana", "Luis", "Maria", "Jose", "Carla", "Diego", "Lucia", "Pedro", "Sofia", "Mateo"]
+LAST_NAMES = ["Gomez", "Perez", "Rodriguez", "Fernandez", "Lopez", "Diaz", "Martinez", "Sanchez"]
+
+
+def departments(count):
+    return [{"DepartmentID": index, "DepartmentName": f"Department {index}"} for index in range(1, count + 1)]
+
+
+def jobs(count):
+    return [{"JobID": index, "JobTitle": f"Job {index}"} for index in range(1, count + 1)]
+
+
+def hired_employees(count, department_count, job_count, seed=0, start=datetime(2020, 1, 1), days=3 * 365):
+    rng = random.Random(seed)
+    for _ in range(count):
+        hire_date = start + timedelta(seconds=rng.randrange(days * 24 * 3600))
+        yield {
+            "FirstName": rng.choice(FIRST_NAMES),
+            "LastName": rng.choice(LAST_NAMES),
+            "HireDate": hire_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "JobID": rng.randint(1, job_count),
+            "DepartmentID": rng.randint(1, department_count)
+        }
+
+
+# Carga directa en la BD local, sin pasar por la API
+def seed_database(path, employees, department_count=12, job_count=183, seed=0):
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO Departments (DepartmentID, DepartmentName) VALUES (?, ?)",
+        [(row["DepartmentID"], row["DepartmentName"]) for row in departments(department_count)]
+    )
+    connection.executemany(
+        "INSERT INTO Jobs (JobID, JobTitle) VALUES (?, ?)",
+        [(row["JobID"], row["JobTitle"]) for row in jobs(job_count)]
+    )
+    connection.executemany(
+        "INSERT INTO HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
+        (
+            (row["FirstName"], row["LastName"], row["HireDate"], row["JobID"], row["DepartmentID"])
+            for row in hired_employees(employees, department_count, job_count, seed)
+        )
+    )
+    connection.commit()
+    connection.close()
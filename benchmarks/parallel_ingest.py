@@ -0,0 +1,99 @@
+# Un lote grande de HiredEmployees por /InsertData en modo bulk frente al modo parallel (hilos y procesos de validacion),
+# sobre los reemplazos locales. SQLite serializa las escrituras: --commit-latency-ms simula el servidor remoto.
+#
+#   python benchmarks/parallel_ingest.py --rows 200000 --write-concurrency 4
+#   python benchmarks/parallel_ingest.py --rows 500000 --processes 4 --commit-latency-ms 20
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+import standins
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--invalid", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--write-concurrency", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--commit-latency-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="globant-parallel-") as workdir:
+        os.environ["JOBS_DB_PATH"] = os.path.join(workdir, "jobs.db")
+        # Se mide una sola peticion: el pool alcanza para todas sus conexiones (ver ingestion.max_write_concurrency)
+        os.environ["EXECUTOR_INSERT_WORKERS"] = "1"
+        os.environ.setdefault("SQL_POOL_MAX_SIZE", str(max(args.write_concurrency, 10)))
+        database = os.path.join(workdir, "bench.db")
+        standins.create_database(database)
+        datagen.seed_database(database, 0)
+
+        import function_app
+        from ingestion import ingest_sharded
+        standins.install(database, os.path.join(workdir, "blobs"))
+        standins.SQLiteConnection.commit_latency = args.commit_latency_ms / 1000
+
+        transactions = list(datagen.hired_employees(args.rows, 12, 183))
+        for position in range(0, args.rows, max(int(1 / args.invalid), 1) if args.invalid else args.rows + 1):
+            transactions[position] = dict(transactions[position], DepartmentID=999)
+
+        def connect():
+            return function_app.DatabaseConnection().connect()
+
+        def run_bulk():
+            return function_app.process_transactions("HiredEmployees", transactions, "bulk", args.chunk_size, False)
+
+        def run_threads():
+            return function_app.summarize_results(transactions, ingest_sharded(
+                connect, "HiredEmployees", transactions, None, args.write_concurrency, args.chunk_size
+            ), False)
+
+        validation_pool = ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context("spawn"))
+        # Arranca los procesos antes de medir
+        list(validation_pool.map(abs, range(args.processes * 4)))
+
+        def run_processes():
+            return function_app.summarize_results(transactions, ingest_sharded(
+                connect, "HiredEmployees", transactions, None, args.write_concurrency, args.chunk_size, validation_pool
+            ), False)
+
+        results = []
+        baseline = None
+        for name, run in (("bulk", run_bulk), ("parallel_threads", run_threads), ("parallel_processes", run_processes)):
+            start = time.perf_counter()
+            response = run()
+            elapsed = time.perf_counter() - start
+            rows = [error["row"] for error in response["errors"]]
+            if baseline is None:
+                baseline = (response["successCount"], rows)
+            results.append({
+                "mode": name,
+                "rows": args.rows,
+                "seconds": round(elapsed, 3),
+                "rowsPerSecond": round(args.rows / elapsed),
+                "successCount": response["successCount"],
+                "failureCount": response["failureCount"],
+                # Mismos conteos y errores en el mismo orden de fila que el modo bulk
+                "matchesBulk": (response["successCount"], rows) == baseline
+            })
+        validation_pool.shutdown()
+
+    print(json.dumps(results, indent=2))
+    if not all(result["matchesBulk"] for result in results):
+        print("FAIL: parallel results differ from bulk")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Latencia de los reportes filtrados sobre un dataset sintetico grande, en los reemplazos locales:
+#   before: la vista completa, filtrada en el cliente (lo que hacen hoy los consumidores)
+#   pushdown: los filtros en el SQL, sin indices de apoyo
+#   indexed: los filtros en el SQL con REPORTING_INDEXES creados
+#
+#   python benchmarks/report_filters.py --employees 1000000
+#   python benchmarks/report_filters.py --employees 300000 --repeat 5 --output filters.json
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+import standins
+
+# (nombre, reporte, filtros, filtro equivalente en el cliente sobre la vista)
+SCENARIOS = [
+    ("one_department", "EmployeeHiresByQuarter", {"departments": [3]},
+     lambda row: row["Department"] == "Department 3"),
+    ("few_jobs_q2_q3", "EmployeeHiresByQuarter", {"jobs": [1, 2, 3], "quarterFrom": 2, "quarterTo": 3},
+     lambda row: row["Job"] in ("Job 1", "Job 2", "Job 3") and row["Q2"] + row["Q3"] > 0),
+    ("top_10", "EmployeeHiresByQuarter", {"top": 10}, None),
+    ("above_average_q1", "DepartmentsAboveAverage", {"quarterFrom": 1, "quarterTo": 1}, None),
+]
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="globant-filters-") as workdir:
+        os.environ["JOBS_DB_PATH"] = os.path.join(workdir, "jobs.db")
+        database = os.path.join(workdir, "bench.db")
+        standins.create_database(database)
+        datagen.seed_database(database, args.employees)
+        standins.install(database, os.path.join(workdir, "blobs"))
+
+        from api_reporting_gc import APIReportingGC, REPORTING_INDEXES, report_filters
+        api = APIReportingGC()
+        loaders = {
+            "EmployeeHiresByQuarter": api.get_employee_hires_by_quarter,
+            "DepartmentsAboveAverage": api.get_departments_above_average_hires
+        }
+
+        results = []
+        for name, report, filter_values, client_filter in SCENARIOS:
+            filters = report_filters(
+                2021, filter_values.get("departments"), filter_values.get("jobs"),
+                filter_values.get("quarterFrom"), filter_values.get("quarterTo"), filter_values.get("top")
+            )
+            before_ms, rows = timed(lambda: loaders[report](), args.repeat)
+            if client_filter is not None:
+                rows = [row for row in rows if client_filter(row)]
+            pushdown_ms, filtered = timed(lambda: loaders[report](None, None, filters), args.repeat)
+            results.append({
+                "scenario": name, "report": report, "filters": filters, "rows": len(filtered),
+                "beforeMs": before_ms, "pushdownMs": pushdown_ms,
+                "viewRows": len(rows) if client_filter is not None else None,
+                "matchesView": len(rows) == len(filtered) if client_filter is not None else None
+            })
+
+        # El DDL es T-SQL estandar; en SQLite solo se quita el esquema
+        connection = sqlite3.connect(database)
+        for ddl in REPORTING_INDEXES.values():
+            connection.execute(ddl.replace("GlobantPoc.", ""))
+        connection.execute("ANALYZE")
+        connection.close()
+
+        for result, (_, report, _, _) in zip(results, SCENARIOS):
+            result["indexedMs"], _ = timed(lambda: loaders[report](None, None, result["filters"]), args.repeat)
+
+    print(json.dumps(results, indent=2))
+    for result in results:
+        print(f"{result['scenario']:<20} before {result['beforeMs']:>9} ms   pushdown {result['pushdownMs']:>9} ms   indexed {result['indexedMs']:>9} ms")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
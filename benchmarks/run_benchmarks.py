@@ -0,0 +1,188 @@
+# Benchmark de /InsertData, /BackupData, /RestoreData y los reportes contra reemplazos locales
+# (SQLite + carpeta local como Blob Storage). Reporta rows/s, p50/p95/p99 y memoria pico.
+#
+#   python benchmarks/run_benchmarks.py --batch-sizes 100,1000,5000 --employees 50000
+#   python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.2
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import datagen
+import standins
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Benchmark:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.source_db = os.path.join(workdir, "source.db")
+        self.target_db = os.path.join(workdir, "target.db")
+        self.insert_db = os.path.join(workdir, "insert.db")
+
+        standins.install(self.source_db, os.path.join(workdir, "blobs"))
+        import function_app
+        self.function_app = function_app
+
+    async def request(self, client, method, path, body=None):
+        response = await client.request(method, path, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+        result = response.json()
+        # Backup y restore responden 200 con el estado de cada tabla
+        if isinstance(result, list) and any(isinstance(item, dict) and item.get("status") == "error" for item in result):
+            raise RuntimeError(f"{method} {path} failed: {result}")
+        return result
+
+    # Corre la operacion varias veces; la memoria pico se mide en una corrida aparte con tracemalloc
+    async def measure(self, name, rows, operation, setup=None):
+        latencies = []
+        for _ in range(self.args.iterations):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        await operation()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {
+            "rows": rows,
+            "iterations": len(latencies),
+            "rowsPerSecond": round(rows / statistics.mean(latencies), 1) if rows else None,
+            "p50Ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95Ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99Ms": round(percentile(latencies, 99) * 1000, 2),
+            "peakMemoryMB": round(peak / (1024 * 1024), 2)
+        }
+        print(f"{name:<40} {json.dumps(result)}")
+        return name, result
+
+    async def run(self):
+        args = self.args
+        results = {}
+
+        standins.create_database(self.source_db)
+        datagen.seed_database(self.source_db, args.employees)
+
+        transport = httpx.ASGITransport(app=self.function_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for batch_size in args.batch_sizes:
+                batch = list(datagen.hired_employees(batch_size, 12, 183, seed=batch_size))
+
+                def fresh_insert_db():
+                    standins.create_database(self.insert_db)
+                    datagen.seed_database(self.insert_db, 0)
+                    standins.use_database(self.insert_db)
+
+                for mode in ("row", "bulk"):
+                    body = {"transactionType": "HiredEmployees", "transactions": batch, "mode": mode}
+                    name, result = await self.measure(
+                        f"insert_{mode}@{batch_size}", batch_size,
+                        lambda body=body: self.request(client, "POST", "/InsertData", body),
+                        setup=fresh_insert_db
+                    )
+                    results[name] = result
+
+            standins.use_database(self.source_db)
+            name, result = await self.measure(
+                f"backup_full@{args.employees}", args.employees,
+                lambda: self.request(client, "POST", "/BackupData", {"tableName": "all", "wait": True})
+            )
+            results[name] = result
+
+            def fresh_target_db():
+                standins.create_database(self.target_db)
+                standins.use_database(self.target_db)
+
+            name, result = await self.measure(
+                f"restore_full@{args.employees}", args.employees,
+                lambda: self.request(client, "POST", "/RestoreData", {"tableName": "all", "resume": False, "wait": True}),
+                setup=fresh_target_db
+            )
+            results[name] = result
+
+            standins.use_database(self.source_db)
+            for report in ("EmployeeHiresByQuarter", "DepartmentsAboveAverage"):
+                name, result = await self.measure(
+                    f"report_{report}@{args.employees}", 0,
+                    lambda report=report: self.request(client, "GET", f"/{report}"),
+                    setup=self.function_app.reporting_cache.invalidate
+                )
+                results[name] = result
+
+        return results
+
+
+# Compara contra la linea base: menos rows/s o mayor p95 que la tolerancia cuenta como regresion
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["rowsPerSecond"] and expected.get("rowsPerSecond"):
+            if result["rowsPerSecond"] < expected["rowsPerSecond"] * (1 - tolerance):
+                regressions.append(f"{name}: {result['rowsPerSecond']} rows/s vs baseline {expected['rowsPerSecond']}")
+        if result["p95Ms"] > expected["p95Ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95Ms']} ms vs baseline {expected['p95Ms']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", default="100,1000,5000", type=lambda value: [int(size) for size in value.split(",")])
+    parser.add_argument("--employees", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="globant-bench-") as workdir:
+        results = asyncio.run(Benchmark(args, workdir).run())
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
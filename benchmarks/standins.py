@@ -0,0 +1,182 @@
+# Reemplazos locales para correr la API sin SQL Server ni Azure:
+# una BD SQLite con la interfaz de pyodbc que usa el codigo y Blob Storage en una carpeta local.
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Departments (
+    DepartmentID INTEGER PRIMARY KEY,
+    DepartmentName TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Jobs (
+    JobID INTEGER PRIMARY KEY,
+    JobTitle TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS HiredEmployees (
+    EmployeeID INTEGER PRIMARY KEY,
+    FirstName TEXT NOT NULL,
+    LastName TEXT NOT NULL,
+    HireDate TEXT NOT NULL,
+    JobID INTEGER NOT NULL REFERENCES Jobs (JobID),
+    DepartmentID INTEGER NOT NULL REFERENCES Departments (DepartmentID)
+);
+CREATE TABLE IF NOT EXISTS TransactionLogs (
+    LogID INTEGER PRIMARY KEY,
+    TransactionType TEXT,
+    TransactionData TEXT,
+    ErrorMessage TEXT
+);
+CREATE VIEW IF NOT EXISTS VW_HiresByDepartmentJobQuarter AS
+SELECT d.DepartmentName AS Department, j.JobTitle AS Job,
+    SUM(CASE WHEN (CAST(strftime('%m', h.HireDate) AS INTEGER) + 2) / 3 = 1 THEN 1 ELSE 0 END) AS Q1,
+    SUM(CASE WHEN (CAST(strftime('%m', h.HireDate) AS INTEGER) + 2) / 3 = 2 THEN 1 ELSE 0 END) AS Q2,
+    SUM(CASE WHEN (CAST(strftime('%m', h.HireDate) AS INTEGER) + 2) / 3 = 3 THEN 1 ELSE 0 END) AS Q3,
+    SUM(CASE WHEN (CAST(strftime('%m', h.HireDate) AS INTEGER) + 2) / 3 = 4 THEN 1 ELSE 0 END) AS Q4
+FROM HiredEmployees h
+JOIN Departments d ON d.DepartmentID = h.DepartmentID
+JOIN Jobs j ON j.JobID = h.JobID
+WHERE strftime('%Y', h.HireDate) = '2021'
+GROUP BY d.DepartmentName, j.JobTitle;
+CREATE VIEW IF NOT EXISTS VW_DepartmentsAboveAverageHires AS
+WITH hires AS (
+    SELECT DepartmentID, COUNT(*) AS hired
+    FROM HiredEmployees
+    WHERE strftime('%Y', HireDate) = '2021'
+    GROUP BY DepartmentID
+)
+SELECT d.DepartmentID AS id, d.DepartmentName AS department, h.hired
+FROM hires h
+JOIN Departments d ON d.DepartmentID = h.DepartmentID
+WHERE h.hired > (SELECT AVG(hired) FROM hires);
+"""
+
+_OUTPUT_INSERTED = re.compile(r"OUTPUT INSERTED\.(\w+)\s+(VALUES\s*\(.*\))", re.IGNORECASE | re.DOTALL)
+_DATEPART_QUARTER = re.compile(r"DATEPART\(QUARTER, (\w+)\)", re.IGNORECASE)
+
+
+# Adapta el T-SQL que usa la API al dialecto de SQLite
+def translate(query, params):
+    query = query.replace("GlobantPoc.", "")
+    params = list(params)
+    if "TOP (?)" in query:
+        query = query.replace("TOP (?) ", "").rstrip().rstrip(";") + " LIMIT ?"
+        params = params[1:] + params[:1]
+    query = _OUTPUT_INSERTED.sub(r"\2 RETURNING \1", query)
+    query = _DATEPART_QUARTER.sub(r"((CAST(strftime('%m', \1) AS INTEGER) + 2) / 3)", query)
+    query = query.replace("OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY", "LIMIT ?")
+    # SQLite compara HireDate como texto ISO; los limites de fecha se pasan en el mismo formato
+    params = [param.strftime("%Y-%m-%dT%H:%M:%S") if isinstance(param, datetime) else param for param in params]
+    return query, params
+
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fast_executemany = False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, *params):
+        if query.strip().upper().startswith("SET IDENTITY_INSERT"):
+            return self
+        query, params = translate(query, params)
+        self._cursor.execute(query, params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        query, _ = translate(query, [])
+        self._cursor.executemany(query, seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    # Latencia simulada de un COMMIT contra un servidor remoto (segundos)
+    commit_latency = 0.0
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+
+    def cursor(self):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+        if SQLiteConnection.commit_latency:
+            time.sleep(SQLiteConnection.commit_latency)
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+# Reemplazo de DatabaseConnection: misma interfaz (connect) sobre un archivo SQLite
+class SQLiteDatabaseConnection:
+    path = None
+
+    def __init__(self):
+        self.connection = None
+
+    def connect(self):
+        self.connection = SQLiteConnection(SQLiteDatabaseConnection.path)
+        return self.connection
+
+    @staticmethod
+    def pool_stats():
+        return {}
+
+
+def create_database(path):
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    connection.commit()
+    connection.close()
+
+
+# Apunta la API a los reemplazos locales; se llama antes de importar function_app
+def install(database_path, blob_root, container_name="backups"):
+    os.environ.setdefault("ENVIRONMENT", "AZURE")
+    os.environ["BLOB_STORAGE_CONNECTION_STRING"] = f"file://{blob_root}"
+    os.environ["BLOB_CONTAINER_NAME"] = container_name
+    SQLiteDatabaseConnection.path = database_path
+
+    # Los modulos que se importen despues toman el reemplazo al hacer "from database_connection import ..."
+    import database_connection
+    database_connection.DatabaseConnection = SQLiteDatabaseConnection
+
+    # Los que ya estaban importados se actualizan a mano (sin importar los que la app carga de forma diferida)
+    for name in ("api_transactional_gc", "api_datamanagement_gc", "api_reporting_gc", "hire_aggregates", "transaction_log", "function_app"):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.DatabaseConnection = SQLiteDatabaseConnection
+
+
+def use_database(database_path):
+    SQLiteDatabaseConnection.path = database_path
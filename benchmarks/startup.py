@@ -0,0 +1,108 @@
+# Arranque en frio: tiempo de "import function_app" y de la primera respuesta, cada corrida en un proceso nuevo.
+# Falla si el tiempo empeora frente a la linea base o si se cargan al inicio modulos que deben ser diferidos.
+#
+#   python benchmarks/startup.py --runs 5
+#   python benchmarks/startup.py --save-baseline benchmarks/startup_baseline.json
+#   python benchmarks/startup.py --baseline benchmarks/startup_baseline.json --tolerance 0.25
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+
+# Solo los necesita backup/restore o Key Vault; no deben importarse al arrancar
+DEFERRED_MODULES = ["fastavro", "azure.storage.blob", "azure.identity", "azure.keyvault.secrets", "api_datamanagement_gc"]
+
+CHILD = """
+import asyncio, json, sys, time
+sys.path[:0] = [{root!r}, {benchmarks!r}]
+import standins, datagen
+standins.create_database({database!r})
+datagen.seed_database({database!r}, {employees})
+
+start = time.perf_counter()
+import function_app
+imported = time.perf_counter()
+loaded_at_import = [name for name in {deferred!r} if name in sys.modules]
+
+# Los reemplazos se instalan despues de medir el import, sobre los modulos ya cargados
+standins.install({database!r}, {blobs!r})
+
+import httpx
+async def first_request():
+    transport = httpx.ASGITransport(app=function_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        request_start = time.perf_counter()
+        response = await client.get("/EmployeeHiresByQuarter")
+        response.raise_for_status()
+        return time.perf_counter() - request_start
+first_response = asyncio.run(first_request())
+
+print(json.dumps({{
+    "importMs": (imported - start) * 1000,
+    "firstResponseMs": first_response * 1000,
+    "totalMs": (imported - start + first_response) * 1000,
+    "deferredLoaded": loaded_at_import
+}}))
+"""
+
+
+def run_once(workdir, employees):
+    code = CHILD.format(
+        root=ROOT, benchmarks=BENCHMARKS, employees=employees, deferred=DEFERRED_MODULES,
+        database=os.path.join(workdir, "startup.db"), blobs=os.path.join(workdir, "blobs")
+    )
+    env = dict(os.environ, ENVIRONMENT="AZURE", JOBS_DB_PATH=os.path.join(workdir, "jobs.db"))
+    output = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="globant-startup-") as workdir:
+        for _ in range(args.runs):
+            runs.append(run_once(workdir, args.employees))
+
+    results = {
+        metric: round(statistics.median(run[metric] for run in runs), 1)
+        for metric in ("importMs", "firstResponseMs", "totalMs")
+    }
+    deferred_loaded = sorted({name for run in runs for name in run["deferredLoaded"]})
+    print(json.dumps(dict(results, runs=args.runs, deferredLoaded=deferred_loaded), indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    regressions = [f"{name} imported at startup" for name in deferred_loaded]
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        for metric, value in results.items():
+            if metric in baseline and value > baseline[metric] * (1 + args.tolerance):
+                regressions.append(f"{metric}: {value} ms vs baseline {baseline[metric]} ms")
+
+    if regressions:
+        print("REGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No startup regressions.")
+
+
+if __name__ == "__main__":
+    main()
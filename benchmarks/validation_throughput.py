@@ -0,0 +1,89 @@
+# Velocidad de la validacion por columnas de /InsertData (filas/s), sin BD: las referencias se resuelven en memoria.
+# Falla si alguna corrida queda por debajo de --min-rows-per-second.
+#
+#   python benchmarks/validation_throughput.py --rows 200000 --invalid 0.05
+#   python benchmarks/validation_throughput.py --min-rows-per-second 300000
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+from ingestion import validate_batch
+
+DEPARTMENTS = 12
+JOBS = 183
+
+# Cada fila invalida tiene uno de estos defectos
+DEFECTS = [
+    lambda row: row.pop("FirstName"),
+    lambda row: row.update(HireDate="not a date"),
+    lambda row: row.update(JobID="abc"),
+    lambda row: row.update(DepartmentID=DEPARTMENTS + 1),
+    lambda row: row.update(LastName=None)
+]
+
+
+def transactions(transaction_type, rows, invalid, seed=0):
+    rng = random.Random(seed)
+    if transaction_type == "HiredEmployees":
+        batch = list(datagen.hired_employees(rows, DEPARTMENTS, JOBS, seed))
+        for row in batch:
+            if rng.random() < invalid:
+                rng.choice(DEFECTS)(row)
+        return batch
+    field = "DepartmentName" if transaction_type == "Departments" else "JobTitle"
+    return [{field: None if rng.random() < invalid else f"{transaction_type} {index}"} for index in range(rows)]
+
+
+def existing_ids(table, ids):
+    return {value for value in ids if 1 <= value <= (DEPARTMENTS if table == "Departments" else JOBS)}
+
+
+def measure(transaction_type, batch, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results, valid_positions, _ = validate_batch(transaction_type, batch, existing_ids)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "transactionType": transaction_type,
+        "rows": len(batch),
+        "valid": len(valid_positions),
+        "invalid": len(batch) - len(valid_positions),
+        "seconds": round(best, 4),
+        "rowsPerSecond": round(len(batch) / best)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--invalid", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--types", default="HiredEmployees,Departments,Jobs")
+    parser.add_argument("--min-rows-per-second", type=float, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for transaction_type in args.types.split(","):
+        batch = transactions(transaction_type, args.rows, args.invalid)
+        results.append(measure(transaction_type, batch, args.repeat))
+    print(json.dumps(results, indent=2))
+
+    slow = [result for result in results if result["rowsPerSecond"] < args.min_rows_per_second]
+    if slow:
+        for result in slow:
+            print(f"{result['transactionType']}: {result['rowsPerSecond']} rows/s is below {args.min_rows_per_second:.0f} rows/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
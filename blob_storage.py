@@ -0,0 +1,205 @@
+import hashlib
+import os
+import shutil
+from azure.core.exceptions import ResourceNotFoundError
+from metrics import blob_bytes
+
+LOCAL_PREFIX = "file://"
+DEFAULT_BLOCK_SIZE = int(os.getenv("BACKUP_BLOCK_SIZE", str(4 * 1024 * 1024)))
+
+# Cliente de Blob Storage: Azure/Azurite por connection string, o carpeta local con "file://<ruta>"
+def get_blob_service_client():
+    connection_string = os.getenv("BLOB_STORAGE_CONNECTION_STRING")
+    if connection_string and connection_string.startswith(LOCAL_PREFIX):
+        return LocalBlobServiceClient(connection_string[len(LOCAL_PREFIX):])
+    from azure.storage.blob import BlobServiceClient
+    return BlobServiceClient.from_connection_string(connection_string)
+
+
+# Escritor tipo archivo que sube bloques de tamano fijo (stage_block) y los confirma al cerrar
+class BlockBlobWriter:
+    def __init__(self, blob_client, block_size=DEFAULT_BLOCK_SIZE):
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.block_ids = []
+        self.bytes_written = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._closed = False
+
+    # Checksum de todo lo escrito, se guarda en el manifest
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_written += len(data)
+        self._hash.update(data)
+        while len(self._buffer) >= self.block_size:
+            self._stage(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self.bytes_written
+
+    def _stage(self, data):
+        block_id = f"{len(self.block_ids):08d}"
+        self.blob_client.stage_block(block_id, data)
+        self.block_ids.append(block_id)
+        blob_bytes.inc(len(data), direction="upload")
+
+    def close(self):
+        if self._closed:
+            return
+        if self._buffer:
+            self._stage(bytes(self._buffer))
+            self._buffer = bytearray()
+        self.blob_client.commit_block_list(self.block_ids)
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Si hubo un error no se confirma la lista de bloques y el blob anterior queda intacto
+        if exc_type is None:
+            self.close()
+
+
+# Lector tipo archivo sobre download_blob().chunks(), descarga el blob por partes a medida que se lee
+class BlobStreamReader:
+    def __init__(self, downloader):
+        self._chunks = iter(downloader.chunks())
+        self._buffer = bytearray()
+        self._hash = hashlib.sha256()
+        self.bytes_read = 0
+        self.closed = False
+
+    # Checksum de lo descargado; coincide con el del manifest una vez leido todo el blob
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def _fill(self, size):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+            self._hash.update(chunk)
+            self.bytes_read += len(chunk)
+            blob_bytes.inc(len(chunk), direction="download")
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    # Primeros bytes sin consumirlos (para detectar el formato)
+    def peek(self, size):
+        self._fill(size)
+        return bytes(self._buffer[:size])
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self.closed = True
+
+
+# Reemplazo local de BlobServiceClient para pruebas y benchmarks sin Azure
+class LocalBlobServiceClient:
+    def __init__(self, root):
+        self.root = root
+
+    def get_blob_client(self, container, blob):
+        return LocalBlobClient(os.path.join(self.root, container), blob)
+
+
+class LocalBlobClient:
+    def __init__(self, container_path, blob_name):
+        self.container_path = container_path
+        self.blob_name = blob_name
+        self.path = os.path.join(container_path, blob_name)
+        self.blocks_path = os.path.join(container_path, ".blocks", blob_name)
+
+    def upload_blob(self, data, overwrite=False):
+        if os.path.exists(self.path) and not overwrite:
+            raise FileExistsError(f"Blob {self.blob_name} already exists.")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if isinstance(data, (bytes, bytearray)):
+            data = [data]
+        elif hasattr(data, "read"):
+            data = iter(lambda: data.read(DEFAULT_BLOCK_SIZE), b"")
+        with open(self.path, "wb") as blob_file:
+            for chunk in data:
+                blob_file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+
+    def stage_block(self, block_id, data):
+        os.makedirs(self.blocks_path, exist_ok=True)
+        with open(os.path.join(self.blocks_path, block_id), "wb") as block_file:
+            block_file.write(data)
+
+    def commit_block_list(self, block_list):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as blob_file:
+            for block_id in block_list:
+                with open(os.path.join(self.blocks_path, block_id), "rb") as block_file:
+                    shutil.copyfileobj(block_file, blob_file)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(self.blocks_path, ignore_errors=True)
+
+    def download_blob(self):
+        if not os.path.exists(self.path):
+            raise ResourceNotFoundError(f"Blob {self.blob_name} not found.")
+        return LocalBlobDownloader(self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def delete_blob(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"Blob {self.blob_name} not found.")
+
+
+class LocalBlobDownloader:
+    def __init__(self, path, chunk_size=DEFAULT_BLOCK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.size = os.path.getsize(path)
+
+    def readall(self):
+        with open(self.path, "rb") as blob_file:
+            return blob_file.read()
+
+    def chunks(self):
+        with open(self.path, "rb") as blob_file:
+            while True:
+                data = blob_file.read(self.chunk_size)
+                if not data:
+                    break
+                yield data
@@ -1,8 +1,10 @@
 import logging
 import pyodbc
 import os
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
+import threading
+import time
+from collections import deque
+from metrics import InstrumentedCursor, db_connection_acquire
 
 import os
 import json
@@ -13,31 +15,317 @@ import json
 #    for key, value in settings["Values"].items():
 #        os.environ[key] = value
 
+# Cache del secreto de la BD, se resuelve una vez por proceso y se refresca por intervalo
+class SecretCache:
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, force_refresh=False):
+        with self._lock:
+            expired = time.monotonic() - self._fetched_at > self.refresh_interval
+            if self._value is None or expired or force_refresh:
+                self._value = self._resolve()
+                self._fetched_at = time.monotonic()
+            return self._value
+
+    def _resolve(self):
+        if os.getenv("ENVIRONMENT") == "AZURE":
+            return os.getenv("SQL_PASSWORD")
+
+        # Los SDK de Azure se importan solo si hace falta ir a Key Vault (arranque en frio mas rapido)
+        from azure.identity import DefaultAzureCredential
+        from azure.keyvault.secrets import SecretClient
+
+        credential = DefaultAzureCredential()
+        key_vault_url = os.getenv("KEY_VAULT_URL")
+        print(f"Key Vault URL: {key_vault_url}")
+        secret_client = SecretClient(vault_url=key_vault_url, credential=credential)
+        return secret_client.get_secret("dbpassword").value
+
+
+_secret_cache = SecretCache(int(os.getenv("SECRET_REFRESH_INTERVAL", "3600")))
+
+
+# Conexion entregada por el pool, close() la devuelve al pool en lugar de cerrarla
+class PooledConnection:
+    def __init__(self, pool, raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.broken = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def cursor(self):
+        return InstrumentedCursor(self._raw.cursor())
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect_fn, min_size=1, max_size=10, idle_timeout=300,
+                 acquire_timeout=30, health_check_interval=30):
+        self._connect_fn = connect_fn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._evicted = 0
+        self._reconnects = 0
+        self._condition = threading.Condition()
+
+    def _open(self):
+        return PooledConnection(None, self._connect_fn())
+
+    def acquire(self):
+        start = time.perf_counter()
+        try:
+            return self._acquire()
+        finally:
+            db_connection_acquire.observe(time.perf_counter() - start)
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            self._evict_idle()
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.acquire_timeout}s waiting for a database connection."
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                # Reconecta reutilizando el mismo lugar del pool
+                self._close_raw(conn)
+                with self._condition:
+                    self._evicted += 1
+                    self._reconnects += 1
+                conn = None
+            if conn is None:
+                conn = self._open()
+                with self._condition:
+                    self._created += 1
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        conn._pool = self
+        return conn
+
+    def release(self, conn):
+        keep = not conn.broken
+        if keep:
+            try:
+                # Descarta cualquier transaccion que haya quedado abierta
+                conn.raw.rollback()
+            except Exception:
+                keep = False
+
+        with self._condition:
+            self._in_use -= 1
+            if keep:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+            self._condition.notify()
+
+        if not keep:
+            self._close_raw(conn)
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logging.warning(f"Discarding broken pooled connection: {str(e)}")
+            return False
+
+    def _evict_idle(self):
+        # Se llama con el lock tomado
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            oldest = self._idle[0]
+            if now - oldest.last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_raw(oldest)
+
+    @staticmethod
+    def _close_raw(conn):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+
+    def prefill(self):
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                raise
+            with self._condition:
+                self._created += 1
+                self._idle.append(conn)
+                self._condition.notify()
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_raw(conn)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "inUse": self._in_use,
+                "waiting": self._waiting,
+                "created": self._created,
+                "evicted": self._evicted,
+                "reconnects": self._reconnects,
+                "minSize": self.min_size,
+                "maxSize": self.max_size,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_max_size():
+    return int(os.getenv("SQL_POOL_MAX_SIZE", "10"))
+
+
+def get_pool(key, connect_fn):
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                connect_fn,
+                min_size=int(os.getenv("SQL_POOL_MIN_SIZE", "1")),
+                max_size=pool_max_size(),
+                idle_timeout=int(os.getenv("SQL_POOL_IDLE_TIMEOUT", "300")),
+                acquire_timeout=int(os.getenv("SQL_POOL_ACQUIRE_TIMEOUT", "30")),
+                health_check_interval=int(os.getenv("SQL_POOL_HEALTH_CHECK_INTERVAL", "30")),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{server}/{database}": pool.stats() for (server, database, _), pool in pools}
+
+
 class DatabaseConnection:
     def __init__(self):
-        
+
         self.server = os.getenv("SQL_SERVER")
         self.database = os.getenv("SQL_DATABASE")
         self.username = os.getenv("SQL_USERNAME")
         self.driver = '{ODBC Driver 17 for SQL Server}'
-        
-        if os.getenv("ENVIRONMENT") == "AZURE":
-            self.password = os.getenv("SQL_PASSWORD")
-        else:
-            credential = DefaultAzureCredential()
-            key_vault_url = os.getenv("KEY_VAULT_URL")
-            print(f"Key Vault URL: {key_vault_url}")
-            secret_client = SecretClient(vault_url=key_vault_url, credential=credential)
-            self.password = secret_client.get_secret("dbpassword").value
 
+        # El secreto se resuelve al abrir la primera conexion, no al construir el objeto
+        self.pool = get_pool((self.server, self.database, self.username), self._open_connection)
         self.connection = None
 
+    def _open_connection(self):
+        try:
+            return pyodbc.connect(self._connection_string(_secret_cache.get()))
+        except pyodbc.Error as e:
+            if "28000" not in str(e):
+                raise
+            # Login fallido: el secreto pudo haber rotado, se refresca y se reintenta una vez
+            return pyodbc.connect(self._connection_string(_secret_cache.get(force_refresh=True)))
+
+    @property
+    def password(self):
+        return _secret_cache.get()
+
+    def _connection_string(self, password):
+        return (
+            f"DRIVER={self.driver};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={password};Connection Timeout=30"
+        )
+
     def connect(self):
         try:
-            self.connection = pyodbc.connect(
-                f"DRIVER={self.driver};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password};Connection Timeout=30"
-            )
+            self.connection = self.pool.acquire()
             return self.connection
         except Exception as e:
             logging.error(f"Error connecting to database: {str(e)}")
             raise
+
+    # Resuelve el secreto y abre las conexiones minimas del pool antes de la primera peticion
+    def warmup(self):
+        self.pool.prefill()
+
+    @staticmethod
+    def pool_stats():
+        return pool_stats()
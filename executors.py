@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Hilos por endpoint, configurables con EXECUTOR_<NOMBRE>_WORKERS
+EXECUTOR_WORKERS = {
+    "reporting": 8,
+    "insert": 4,
+    "backup": 2,
+    "restore": 2
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+_process_pool = None
+
+
+def executor_workers(name):
+    return int(os.getenv(f"EXECUTOR_{name.upper()}_WORKERS", EXECUTOR_WORKERS[name]))
+
+
+def get_executor(name):
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=executor_workers(name), thread_name_prefix=f"{name}-worker")
+            _executors[name] = executor
+        return executor
+
+
+# Procesos para validar lotes grandes en paralelo (INGEST_VALIDATION_PROCESSES; 0 = validar en los hilos)
+def get_process_pool():
+    global _process_pool
+    with _executors_lock:
+        if _process_pool is None:
+            processes = int(os.getenv("INGEST_VALIDATION_PROCESSES", "0"))
+            if processes <= 0:
+                return None
+            # spawn: el proceso padre tiene hilos (pool de conexiones, escritores) y fork no es seguro
+            _process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+# Ejecuta codigo bloqueante (pyodbc, blob storage, Key Vault) fuera del event loop
+async def run_blocking(name, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
+
+
+def shutdown_executors(wait=True):
+    global _process_pool
+    with _executors_lock:
+        executors = list(_executors.items())
+        _executors.clear()
+        process_pool, _process_pool = _process_pool, None
+    if process_pool is not None:
+        logging.info("Shutting down validation processes...")
+        process_pool.shutdown(wait=wait)
+    for name, executor in executors:
+        logging.info(f"Shutting down {name} executor...")
+        executor.shutdown(wait=wait)
@@ -1,85 +1,350 @@
-from fastapi import FastAPI, HTTPException, Request
-from api_transactional_gc import API_Transactional_GC, DatabaseConnection, DataInserter, DataValidator
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import Headers
+from api_transactional_gc import DatabaseConnection
+from ingestion import HANDLERS, IngestionEngine, ingest_sharded, log_errors
+import importlib
 import logging
-from api_datamanagement_gc import DataBackup, DataRestore
-from api_reporting_gc import APIReportingGC 
+import os
+import json
+from api_reporting_gc import APIReportingGC, REPORTING_INDEXES, report_filters
+from executors import get_process_pool, run_blocking, shutdown_executors
+from result_cache import reporting_cache
+from hire_aggregates import HireAggregates
+from transaction_log import transaction_log_writer
+from jobs import job_manager
+from write_coalescer import coalescing_enabled, write_coalescer
+from wire_formats import ETAG_SUFFIXES, NegotiatedResponse, decode_body, encode, negotiate, response_media_type, set_response_media_type, transactions_from_body
+from metrics import http_request_duration, log_slow_request, registry, stage, start_request
+import threading
+import time
+from datetime import datetime
+from typing import List
 
-reporting_api = APIReportingGC()
+# Se crea en la primera peticion de reportes, no al importar el modulo
+reporting_api = None
 
-app = FastAPI()
+def get_reporting_api():
+    global reporting_api
+    if reporting_api is None:
+        reporting_api = APIReportingGC()
+    return reporting_api
+
+# echo_transactions=False devuelve solo el numero de fila de cada error (formatos compactos)
+def summarize_results(transactions, results, echo_transactions=True):
+    success_count = 0
+    failure_count = 0
+    errors = []
+
+    for row, (transaction, (success, error_message)) in enumerate(zip(transactions, results)):
+        if success:
+            success_count += 1
+        else:
+            failure_count += 1
+            error = {"row": row, "error": error_message}
+            if echo_transactions:
+                error["transaction"] = transaction
+            errors.append(error)
+
+    return {
+        "successCount": success_count,
+        "failureCount": failure_count,
+        "errors": errors
+    }
+
+def process_transactions(transaction_type, transactions, mode, chunk_size, echo_transactions=True, shard_size=None, write_concurrency=None):
+    # mode=parallel: shards validados y escritos a la vez, cada uno en su propia conexion
+    if mode == "parallel":
+        results = ingest_sharded(
+            lambda: DatabaseConnection().connect(), transaction_type, transactions,
+            shard_size, write_concurrency, chunk_size, get_process_pool()
+        )
+        return summarize_results(transactions, results, echo_transactions)
+
+    with stage("connect"):
+        connection = DatabaseConnection().connect()
+    try:
+        engine = IngestionEngine(connection)
+        # Validacion por columnas de todo el lote; solo las filas validas llegan al INSERT
+        results = engine.ingest(transaction_type, transactions, "bulk" if mode == "bulk" else "row", chunk_size)
+        log_errors(engine, transaction_type, transactions, results)
+    finally:
+        connection.close()
+
+    return summarize_results(transactions, results, echo_transactions)
+
+# Escribe un lote armado por write_coalescer con filas de varias peticiones, en una sola transaccion
+def write_coalesced_batch(transaction_type, transactions):
+    with stage("connect"):
+        connection = DatabaseConnection().connect()
+    try:
+        engine = IngestionEngine(connection)
+        results = engine.ingest(transaction_type, transactions, "bulk", max(len(transactions), 1))
+        log_errors(engine, transaction_type, transactions, results)
+        return results
+    finally:
+        connection.close()
+
+write_coalescer.register(write_coalesced_batch)
+
+# Procesa un chunk del stream NDJSON y devuelve un resumen compacto (sin repetir las transacciones)
+def process_chunk(transaction_type, transactions, rows, chunk_size):
+    errors = []
+    if transaction_type not in HANDLERS:
+        errors = [{"row": row, "error": "Invalid transaction type."} for row in rows]
+    else:
+        with stage("connect"):
+            connection = DatabaseConnection().connect()
+        try:
+            engine = IngestionEngine(connection)
+            results = engine.ingest(transaction_type, transactions, "bulk", chunk_size)
+            log_errors(engine, transaction_type, transactions, results)
+            errors = [
+                {"row": row, "error": error_message} for row, (success, error_message) in zip(rows, results) if not success
+            ]
+        finally:
+            connection.close()
+
+    return {
+        "rows": len(transactions),
+        "successCount": len(transactions) - len(errors),
+        "failureCount": len(errors),
+        "errors": errors
+    }
+
+# Parametros de tamano (chunkSize, shardSize, writeConcurrency): enteros mayores que cero o 400
+def positive_int(value, name):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name} must be a positive integer")
+    if value <= 0:
+        raise HTTPException(status_code=400, detail=f"{name} must be a positive integer")
+    return value
+
+# Lee el cuerpo NDJSON a medida que llega, una transaccion por linea
+async def iter_ndjson(request):
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+# StreamingResponse (ASGI < 2.4) escucha receive() para detectar la desconexion y se come el cuerpo que
+# el generador todavia esta leyendo; esta respuesta solo envia, y la desconexion llega por request.stream()
+class IngestStreamResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+# api_datamanagement_gc (fastavro, SDK de Blob Storage) se importa solo al usar backup/restore
+def run_backup(table_name, mode="full", progress=None, format_name=None, codec=None):
+    from api_datamanagement_gc import DataBackup
+    data_backup = DataBackup(progress, format_name, codec)
+    if table_name == "all":
+        return data_backup.backup_all_tables(mode)
+    return data_backup.backup_table(table_name, mode)
+
+def run_restore(table_name, resume=False, until=None, progress=None):
+    from api_datamanagement_gc import DataRestore
+    data_restore = DataRestore(progress)
+    if table_name == "all":
+        return data_restore.restore_all_tables(resume, until)
+    return data_restore.restore_table(table_name, resume, until)
+
+job_manager.register("backup", lambda params, progress: run_backup(
+    params["tableName"], params["mode"], progress, params.get("format"), params.get("codec")
+))
+job_manager.register("restore", lambda params, progress: run_restore(params["tableName"], params["resume"], params["until"], progress))
+
+app = FastAPI(default_response_class=NegotiatedResponse)
+
+# Los middlewares son ASGI puros: no leen receive(), asi /InsertDataStream recibe el cuerpo completo
+# mientras ya esta enviando su respuesta (BaseHTTPMiddleware se queda con esos mensajes)
+
+# Rutas que responden siempre en su propio formato (texto de Prometheus, NDJSON): no se negocian
+FIXED_FORMAT_PATHS = {"/metrics", "/InsertDataStream"}
+
+# Formato de respuesta segun Accept: JSON, JSON columnar, MessagePack o Arrow IPC
+class NegotiateResponseFormat:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in FIXED_FORMAT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept")
+        media_type = negotiate(accept)
+        if media_type is None:
+            response = JSONResponse(status_code=406, content={"detail": f"None of the accepted formats is available: {accept}"})
+            await response(scope, receive, send)
+            return
+        set_response_media_type(media_type)
+        await self.app(scope, receive, send)
+
+# Duracion por endpoint y desglose por etapa para el log de peticiones lentas
+class InstrumentRequests:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stages = start_request()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_request_duration.observe(elapsed, method=scope["method"], path=path, status=status)
+            log_slow_request(scope["method"], path, status, elapsed, stages)
+
+app.add_middleware(NegotiateResponseFormat)
+app.add_middleware(InstrumentRequests)
+
+# Abre las conexiones del pool y carga los modulos de backup/restore antes de la primera peticion
+def warmup():
+    start = time.perf_counter()
+    try:
+        DatabaseConnection().warmup()
+        # Solo se importa para cargarlo (fastavro, SDK de Blob Storage) antes del primer backup/restore
+        importlib.import_module("api_datamanagement_gc")
+        logging.info(f"Warm-up completed in {time.perf_counter() - start:.2f}s.")
+    except Exception as e:
+        logging.error(f"Error during warm-up: {str(e)}")
+
+# Retoma los trabajos de backup/restore pendientes; WARMUP_ON_STARTUP=true precalienta en segundo plano
+@app.on_event("startup")
+def startup():
+    job_manager.start()
+    if os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true":
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await write_coalescer.close()
+    job_manager.shutdown()
+    shutdown_executors()
+    transaction_log_writer.close()
 
 @app.post("/InsertData")
 async def insert_data(request: Request):
     logging.info('Processing InsertData request...')
 
     try:
-        req_body = await request.json()
+        # JSON, JSON columnar, MessagePack o Arrow IPC segun Content-Type; los parametros de la URL completan el cuerpo
+        req_body = decode_body(await request.body(), request.headers.get("content-type"), dict(request.query_params))
         transaction_type = req_body.get("transactionType")
-        transactions = req_body.get("transactions")
+        transactions = transactions_from_body(req_body)
 
         if not transaction_type or not transactions or not isinstance(transactions, list):
             raise HTTPException(status_code=400, detail="Transaction type and a list of transactions are required")
 
-        connection = DatabaseConnection().connect()
-        data_inserter = DataInserter(connection)
-        data_validator = DataValidator(connection)
-
-        success_count = 0
-        failure_count = 0
-        errors = []
-
-        # Validar y procesar las transacciones
-        for transaction in transactions:
-            is_valid = False
-            error_message = None
-            success = False
-
-            if transaction_type == "HiredEmployees":
-                is_valid, error_message = data_validator.validate_hired_employee(transaction)
-                if is_valid:
-                    success, error_message = data_inserter.insert_hired_employee(transaction)
-            elif transaction_type == "Departments":
-                is_valid, error_message = data_validator.validate_department(transaction)
-                if is_valid:
-                    success, error_message = data_inserter.insert_department(transaction)
-            elif transaction_type == "Jobs":
-                is_valid, error_message = data_validator.validate_job(transaction)
-                if is_valid:
-                    success, error_message = data_inserter.insert_job(transaction)
-            else:
-                error_message = "Invalid transaction type."
-
-            if is_valid and success:
-                success_count += 1
-            else:
-                failure_count += 1
-                errors.append({"transaction": transaction, "error": error_message})
-                data_inserter.log_transaction_error(transaction_type, transaction, error_message)
-
-        connection.close()
+        mode = req_body.get("mode", os.getenv("INSERT_MODE", "row"))
+        chunk_size = positive_int(req_body.get("chunkSize", os.getenv("INSERT_CHUNK_SIZE", "1000")), "chunkSize")
 
-        return {
-            "successCount": success_count,
-            "failureCount": failure_count,
-            "errors": errors
-        }
+        echo_transactions = response_media_type() == "application/json"
+        # INSERT_COALESCE=true (o "coalesce": true) junta las peticiones pequenas concurrentes en una sola escritura
+        coalesce = str(req_body.get("coalesce", coalescing_enabled())).lower() == "true"
+        if coalesce and transaction_type in HANDLERS and len(transactions) < write_coalescer.max_rows:
+            with stage("coalesced_insert"):
+                results = await write_coalescer.submit(transaction_type, transactions)
+            return summarize_results(transactions, results, echo_transactions)
+        shard_size = positive_int(req_body["shardSize"], "shardSize") if "shardSize" in req_body else None
+        write_concurrency = positive_int(req_body["writeConcurrency"], "writeConcurrency") if "writeConcurrency" in req_body else None
+        return await run_blocking(
+            "insert", process_transactions, transaction_type, transactions, mode, chunk_size, echo_transactions, shard_size, write_concurrency
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@app.post("/InsertDataStream")
+async def insert_data_stream(request: Request, transactionType: str, chunkSize: int = int(os.getenv("STREAM_CHUNK_SIZE", "5000"))):
+    logging.info('Processing InsertDataStream request...')
+    chunkSize = positive_int(chunkSize, "chunkSize")
+
+    async def flush(offset, rows, transactions, parse_errors):
+        result = await run_blocking("insert", process_chunk, transactionType, transactions, rows, chunkSize)
+        result = {"offset": offset, **result}
+        if parse_errors:
+            result["errors"] = sorted(parse_errors + result["errors"], key=lambda error: error["row"])
+            result["rows"] += len(parse_errors)
+            result["failureCount"] += len(parse_errors)
+        return result
+
+    async def results():
+        totals = {"rows": 0, "successCount": 0, "failureCount": 0}
+        offset = 0
+        row = 0
+        rows, transactions, parse_errors = [], [], []
+        try:
+            async for line in iter_ndjson(request):
+                try:
+                    transaction = json.loads(line)
+                    if not isinstance(transaction, dict):
+                        raise ValueError("each line must be a JSON object")
+                    rows.append(row)
+                    transactions.append(transaction)
+                except ValueError as e:
+                    parse_errors.append({"row": row, "error": f"Invalid record: {str(e)}"})
+                row += 1
+
+                if row - offset >= chunkSize:
+                    result = await flush(offset, rows, transactions, parse_errors)
+                    for key in totals:
+                        totals[key] += result[key]
+                    yield json.dumps(result) + "\n"
+                    offset = row
+                    rows, transactions, parse_errors = [], [], []
+
+            if row > offset:
+                result = await flush(offset, rows, transactions, parse_errors)
+                for key in totals:
+                    totals[key] += result[key]
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logging.error(f"Error during InsertDataStream at row {offset}: {str(e)}")
+            yield json.dumps({"offset": offset, "error": str(e)}) + "\n"
+
+        yield json.dumps({"summary": totals}) + "\n"
+
+    return IngestStreamResponse(results(), media_type="application/x-ndjson")
+
 @app.post("/BackupData")
 async def backup_data(request: Request):
     try:
         req_body = await request.json()
         table_name = req_body.get("tableName", "all") 
-        data_backup = DataBackup()
-        
-        if table_name == "all":
-            result = data_backup.backup_all_tables()
-        else:
-            result = data_backup.backup_table(table_name)
-        
-        return result
+        mode = req_body.get("mode", "full")
+        # format: avro, parquet o arrow; codec segun el formato (por defecto BACKUP_FORMAT / BACKUP_CODEC)
+        format_name = req_body.get("format")
+        codec = req_body.get("codec")
+        # wait=true mantiene el comportamiento anterior: responde al terminar el respaldo
+        if req_body.get("wait", False):
+            return await run_blocking("backup", run_backup, table_name, mode, None, format_name, codec)
+        params = {"tableName": table_name, "mode": mode, "format": format_name, "codec": codec}
+        job_id = await run_blocking("backup", job_manager.submit, "backup", params)
+        return NegotiatedResponse(status_code=202, content={"jobId": job_id, "status": "queued", "statusUrl": f"/Jobs/{job_id}"})
     except Exception as e:
         logging.error(f"Error during backup: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -89,32 +354,144 @@ async def restore_data(request: Request):
     try:
         req_body = await request.json()
         table_name = req_body.get("tableName", "all")
-        data_restore = DataRestore()
-        
-        if table_name == "all":
-            result = data_restore.restore_all_tables()
-        else:
-            result = data_restore.restore_table(table_name)
-        
-        return result
+        resume = req_body.get("resume", False)
+        until = req_body.get("until")
+        # Se valida aca: dentro del restore (o del trabajo) una fecha invalida seria un 500 o un trabajo fallido
+        if until is not None:
+            try:
+                datetime.fromisoformat(until)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="until must be an ISO 8601 date.")
+        if req_body.get("wait", False):
+            return await run_blocking("restore", run_restore, table_name, resume, until)
+        params = {"tableName": table_name, "resume": resume, "until": until}
+        job_id = await run_blocking("restore", job_manager.submit, "restore", params)
+        return NegotiatedResponse(status_code=202, content={"jobId": job_id, "status": "queued", "statusUrl": f"/Jobs/{job_id}"})
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during restore: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/Jobs/{job_id}")
+async def job_status(job_id: str):
+    status = await run_blocking("reporting", job_manager.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return status
+
+@app.post("/Jobs/{job_id}/Cancel")
+async def cancel_job(job_id: str):
+    job = await run_blocking("reporting", job_manager.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return await run_blocking("reporting", job_manager.status, job_id)
     
+# Respuesta desde el cache de reportes, con ETag y 304 si el cliente ya tiene el resultado;
+# el cuerpo codificado en cada formato tambien queda en cache
+async def cached_report(request, key, loader):
+    entry = await run_blocking("reporting", reporting_cache.get_or_load, key, loader)
+    media_type = response_media_type()
+    etag = entry.etag[:-1] + ETAG_SUFFIXES[media_type] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+    body = entry.encoded.get(media_type)
+    if body is None:
+        body = await run_blocking("reporting", encode, entry.value, media_type)
+        entry.encoded[media_type] = body
+    return Response(body, media_type=media_type, headers={"ETag": etag, "Vary": "Accept"})
+
+# stream=true envia las filas a medida que se leen; limit/cursor paginan por keyset; filters se resuelven en SQL
+async def report_response(request, report, limit, cursor, stream, filters=None):
+    if stream:
+        if response_media_type() == "application/json":
+            rows = await run_blocking("reporting", getattr(get_reporting_api(), f"stream_{report}"), filters)
+            return StreamingResponse(rows, media_type="application/json")
+        # Los demas formatos no se pueden armar por partes: se envia la lista completa en el formato pedido
+        limit, cursor = None, None
+
+    # Un cursor sin limit devolveria una lista recortada que se guardaria con la clave del reporte completo
+    if cursor is not None and limit is None:
+        raise HTTPException(status_code=400, detail="cursor requires limit.")
+    key = report if limit is None else f"{report}:{limit}:{cursor}"
+    if filters is not None:
+        key = f"{key}:{json.dumps(filters, sort_keys=True)}"
+    loader = getattr(get_reporting_api(), f"get_{report}")
+    return await cached_report(request, key, lambda: loader(limit, cursor, filters))
+
 @app.get("/EmployeeHiresByQuarter")
-async def employee_hires_by_quarter():
+async def employee_hires_by_quarter(
+    request: Request, limit: int = Query(None, gt=0, le=10000), cursor: str = None, stream: bool = False,
+    year: int = Query(None, ge=1900, le=9999), department: List[int] = Query(None), job: List[int] = Query(None),
+    quarterFrom: int = Query(None, ge=1, le=4), quarterTo: int = Query(None, ge=1, le=4), top: int = Query(None, gt=0, le=10000)
+):
     try:
-        result = reporting_api.get_employee_hires_by_quarter()
+        filters = report_filters(year, department, job, quarterFrom, quarterTo, top)
+        result = await report_response(request, "employee_hires_by_quarter", limit, cursor, stream, filters)
         return result
     except HTTPException as e:
         logging.error(f"Error in EmployeeHiresByQuarter endpoint: {e.detail}")
         raise e
 
 @app.get("/DepartmentsAboveAverage")
-async def departments_above_average():
+async def departments_above_average(
+    request: Request, limit: int = Query(None, gt=0, le=10000), cursor: str = None, stream: bool = False,
+    year: int = Query(None, ge=1900, le=9999), department: List[int] = Query(None), job: List[int] = Query(None),
+    quarterFrom: int = Query(None, ge=1, le=4), quarterTo: int = Query(None, ge=1, le=4), top: int = Query(None, gt=0, le=10000)
+):
     try:
-        result = reporting_api.get_departments_above_average_hires()
+        filters = report_filters(year, department, job, quarterFrom, quarterTo, top)
+        result = await report_response(request, "departments_above_average_hires", limit, cursor, stream, filters)
         return result
     except HTTPException as e:
         logging.error(f"Error in DepartmentsAboveAverage endpoint: {e.detail}")
-        raise e
\ No newline at end of file
+        raise e
+
+@app.post("/RebuildAggregates")
+async def rebuild_aggregates():
+    result = await run_blocking("backup", lambda: HireAggregates().rebuild())
+    reporting_cache.invalidate()
+    return result
+
+# Indices recomendados para los reportes filtrados; POST los crea si faltan
+@app.get("/ReportingIndexes")
+async def reporting_indexes():
+    return {"indexes": [{"name": name, "ddl": ddl} for name, ddl in REPORTING_INDEXES.items()]}
+
+@app.post("/ReportingIndexes")
+async def create_reporting_indexes():
+    return await run_blocking("backup", lambda: get_reporting_api().ensure_indexes())
+
+@app.get("/CheckAggregates")
+async def check_aggregates():
+    try:
+        return await run_blocking("reporting", lambda: HireAggregates().check_consistency())
+    except Exception as e:
+        logging.error(f"Error checking aggregates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Para el ping de precalentamiento de la plataforma (p. ej. slots de despliegue)
+@app.get("/Warmup")
+async def warmup_endpoint():
+    await run_blocking("reporting", warmup)
+    return {"status": "ok", "pool": DatabaseConnection.pool_stats()}
+
+@app.get("/PoolStats")
+async def pool_stats():
+    return DatabaseConnection.pool_stats()
+
+@app.get("/CacheStats")
+async def cache_stats():
+    return reporting_cache.stats()
+
+@app.get("/TransactionLogStats")
+async def transaction_log_stats():
+    return transaction_log_writer.stats()
+
+@app.get("/CoalescerStats")
+async def coalescer_stats():
+    return write_coalescer.stats()
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
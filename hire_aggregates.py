@@ -0,0 +1,162 @@
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from database_connection import DatabaseConnection
+
+AGGREGATE_TABLE = "GlobantPoc.HiresByDepartmentJobQuarterAgg"
+REPORTING_YEAR = int(os.getenv("REPORTING_YEAR", "2021"))
+
+AGGREGATE_TABLE_DDL = f"""
+    IF OBJECT_ID('{AGGREGATE_TABLE}', 'U') IS NULL
+    CREATE TABLE {AGGREGATE_TABLE} (
+        DepartmentID INT NOT NULL,
+        JobID INT NOT NULL,
+        HireYear INT NOT NULL,
+        HireQuarter INT NOT NULL,
+        Hires INT NOT NULL,
+        CONSTRAINT PK_HiresByDepartmentJobQuarterAgg PRIMARY KEY (HireYear, DepartmentID, JobID, HireQuarter)
+    );
+"""
+
+MERGE_HIRES = f"""
+    MERGE {AGGREGATE_TABLE} WITH (HOLDLOCK) AS target
+    USING (SELECT ? AS DepartmentID, ? AS JobID, ? AS HireYear, ? AS HireQuarter, ? AS Hires) AS source
+    ON target.DepartmentID = source.DepartmentID AND target.JobID = source.JobID
+        AND target.HireYear = source.HireYear AND target.HireQuarter = source.HireQuarter
+    WHEN MATCHED THEN UPDATE SET Hires = target.Hires + source.Hires
+    WHEN NOT MATCHED THEN INSERT (DepartmentID, JobID, HireYear, HireQuarter, Hires)
+        VALUES (source.DepartmentID, source.JobID, source.HireYear, source.HireQuarter, source.Hires);
+"""
+
+REBUILD_STATEMENTS = [
+    f"DELETE FROM {AGGREGATE_TABLE};",
+    f"""
+    INSERT INTO {AGGREGATE_TABLE} (DepartmentID, JobID, HireYear, HireQuarter, Hires)
+    SELECT DepartmentID, JobID, YEAR(HireDate), DATEPART(QUARTER, HireDate), COUNT(*)
+    FROM GlobantPoc.HiredEmployees
+    WHERE HireDate IS NOT NULL
+    GROUP BY DepartmentID, JobID, YEAR(HireDate), DATEPART(QUARTER, HireDate);
+    """
+]
+
+# Mismas columnas que las vistas, calculadas sobre la tabla de agregados (departamentos x puestos filas)
+AGGREGATE_REPORTS = {
+    "EmployeeHiresByQuarter": f"""
+        SELECT d.DepartmentName AS Department, j.JobTitle AS Job,
+            SUM(CASE WHEN a.HireQuarter = 1 THEN a.Hires ELSE 0 END) AS Q1,
+            SUM(CASE WHEN a.HireQuarter = 2 THEN a.Hires ELSE 0 END) AS Q2,
+            SUM(CASE WHEN a.HireQuarter = 3 THEN a.Hires ELSE 0 END) AS Q3,
+            SUM(CASE WHEN a.HireQuarter = 4 THEN a.Hires ELSE 0 END) AS Q4
+        FROM {AGGREGATE_TABLE} a
+        JOIN GlobantPoc.Departments d ON d.DepartmentID = a.DepartmentID
+        JOIN GlobantPoc.Jobs j ON j.JobID = a.JobID
+        WHERE a.HireYear = ?
+        GROUP BY d.DepartmentName, j.JobTitle
+    """,
+    "DepartmentsAboveAverage": f"""
+        SELECT d.DepartmentID AS id, d.DepartmentName AS department, h.hired
+        FROM (
+            SELECT DepartmentID, SUM(Hires) AS hired
+            FROM {AGGREGATE_TABLE}
+            WHERE HireYear = ?
+            GROUP BY DepartmentID
+        ) h
+        JOIN GlobantPoc.Departments d ON d.DepartmentID = h.DepartmentID
+        WHERE h.hired > (
+            SELECT AVG(CAST(hired AS FLOAT)) FROM (
+                SELECT SUM(Hires) AS hired
+                FROM {AGGREGATE_TABLE}
+                WHERE HireYear = ?
+                GROUP BY DepartmentID
+            ) per_department
+        )
+    """
+}
+
+AGGREGATE_REPORT_PARAMS = {
+    "EmployeeHiresByQuarter": [REPORTING_YEAR],
+    "DepartmentsAboveAverage": [REPORTING_YEAR, REPORTING_YEAR]
+}
+
+
+def aggregates_enabled():
+    return os.getenv("HIRE_AGGREGATES_ENABLED", "false").lower() == "true"
+
+
+def _year_quarter(hire_date):
+    if not isinstance(hire_date, datetime):
+        hire_date = datetime.fromisoformat(str(hire_date).replace("Z", "+00:00"))
+    return hire_date.year, (hire_date.month - 1) // 3 + 1
+
+
+# Suma las contrataciones nuevas a los agregados dentro de la misma transaccion del INSERT
+def apply_hires(cursor, employees):
+    if not aggregates_enabled():
+        return
+
+    counts = Counter()
+    for employee in employees:
+        year, quarter = _year_quarter(employee["HireDate"])
+        counts[(employee["DepartmentID"], employee["JobID"], year, quarter)] += 1
+
+    if counts:
+        cursor.executemany(MERGE_HIRES, [key + (hires,) for key, hires in counts.items()])
+
+
+class HireAggregates:
+    def __init__(self):
+        self.db_connection = DatabaseConnection()
+
+    def rebuild(self):
+        connection = self.db_connection.connect()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(AGGREGATE_TABLE_DDL)
+            connection.commit()
+            for statement in REBUILD_STATEMENTS:
+                cursor.execute(statement)
+            connection.commit()
+            cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(Hires), 0) FROM {AGGREGATE_TABLE}")
+            groups, hires = cursor.fetchone()
+            logging.info(f"Hire aggregates rebuilt: {groups} groups, {hires} hires.")
+            return {"status": "success", "groups": groups, "hires": hires}
+        except Exception as e:
+            connection.rollback()
+            logging.error(f"Error rebuilding hire aggregates: {str(e)}")
+            return {"status": "error", "message": str(e)}
+        finally:
+            cursor.close()
+            connection.close()
+
+    # Compara cada reporte calculado desde los agregados con su vista original
+    def check_consistency(self):
+        from api_reporting_gc import REPORTS
+
+        connection = self.db_connection.connect()
+        cursor = connection.cursor()
+        try:
+            results = {}
+            for report, definition in REPORTS.items():
+                expected = self._fetch(cursor, f"SELECT * FROM {definition['view']}", [])
+                actual = self._fetch(cursor, AGGREGATE_REPORTS[report], AGGREGATE_REPORT_PARAMS[report])
+                missing = expected - actual
+                extra = actual - expected
+                results[report] = {
+                    "consistent": not missing and not extra,
+                    "viewRows": len(expected),
+                    "aggregateRows": len(actual),
+                    "missing": [list(row) for row in sorted(missing, key=str)[:20]],
+                    "extra": [list(row) for row in sorted(extra, key=str)[:20]]
+                }
+            return results
+        finally:
+            cursor.close()
+            connection.close()
+
+    @staticmethod
+    def _fetch(cursor, query, params):
+        cursor.execute(query, *params)
+        columns = [column[0].lower() for column in cursor.description]
+        order = sorted(range(len(columns)), key=lambda position: columns[position])
+        return {tuple((columns[position], str(row[position])) for position in order) for row in cursor.fetchall()}
@@ -0,0 +1,234 @@
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from api_transactional_gc import DEFAULT_CHUNK_SIZE, DataInserter, DataValidator
+from database_connection import pool_max_size
+from executors import executor_workers
+from metrics import stage
+
+INGEST_SHARD_SIZE = int(os.getenv("INGEST_SHARD_SIZE", "0"))
+INGEST_WRITE_CONCURRENCY = int(os.getenv("INGEST_WRITE_CONCURRENCY", "4"))
+
+# Marcas de valor faltante o invalido que dejan los conversores en la columna
+_MISSING = object()
+_INVALID = object()
+
+
+def _string(value):
+    if value is None:
+        return _MISSING
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return _INVALID
+
+
+def _integer(value):
+    if value is None:
+        return _MISSING
+    if isinstance(value, bool):
+        return _INVALID
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else _INVALID
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return _INVALID
+    return _INVALID
+
+
+# HireDate se valida como ISO 8601 y se conserva como texto (lo usan el INSERT y los agregados)
+def _iso_date(value):
+    if value is None:
+        return _MISSING
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        try:
+            datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return value
+        except ValueError:
+            return _INVALID
+    return _INVALID
+
+
+CONVERTERS = {
+    "string": (_string, "a string"),
+    "integer": (_integer, "an integer"),
+    "date": (_iso_date, "an ISO 8601 date")
+}
+
+
+# Campos, tipos y referencias de un transactionType; valida el lote columna por columna
+class TransactionHandler:
+    def __init__(self, transaction_type, fields, insert_method, references=None):
+        self.transaction_type = transaction_type
+        self.fields = fields
+        self.insert_method = insert_method
+        self.references = references or {}
+
+    # Tipos y nulos; no usa la BD, por lo que puede correr en otro proceso
+    def check_columns(self, transactions):
+        errors = [None if isinstance(transaction, dict) else "Transaction must be an object." for transaction in transactions]
+        columns = {}
+        for name, kind in self.fields:
+            convert, expected = CONVERTERS[kind]
+            column = list(map(convert, [
+                transaction.get(name) if error is None else None for transaction, error in zip(transactions, errors)
+            ]))
+            for position, value in enumerate(column):
+                if errors[position] is not None:
+                    continue
+                if value is _MISSING:
+                    errors[position] = f"{name} is missing or null."
+                elif value is _INVALID:
+                    errors[position] = f"{name} must be {expected}."
+            columns[name] = column
+
+        # Las marcas no sobreviven a pickle; en las filas con error el valor ya no importa
+        for name, column in columns.items():
+            columns[name] = [None if error is not None else value for value, error in zip(column, errors)]
+        return errors, columns
+
+    # Referencias a otras tablas: los IDs distintos de cada columna se resuelven con una consulta por tabla
+    def check_references(self, errors, columns, existing_ids):
+        for name, table in self.references.items():
+            column = columns[name]
+            existing = existing_ids(table, {value for value, error in zip(column, errors) if error is None})
+            for position, value in enumerate(column):
+                if errors[position] is None and value not in existing:
+                    errors[position] = f"{name} does not exist in {table}."
+
+        results = [(False, error) if error is not None else (True, None) for error in errors]
+        valid_positions = [position for position, error in enumerate(errors) if error is None]
+        names = [name for name, _ in self.fields]
+        valid_rows = [
+            dict(zip(names, values)) for values, error in zip(zip(*(columns[name] for name in names)), errors) if error is None
+        ]
+        return results, valid_positions, valid_rows
+
+    def validate(self, transactions, existing_ids, checked=None):
+        errors, columns = checked if checked is not None else self.check_columns(transactions)
+        return self.check_references(list(errors), columns, existing_ids)
+
+
+HANDLERS = {
+    "HiredEmployees": TransactionHandler(
+        "HiredEmployees",
+        [("FirstName", "string"), ("LastName", "string"), ("HireDate", "date"), ("JobID", "integer"), ("DepartmentID", "integer")],
+        "insert_hired_employee",
+        {"DepartmentID": "Departments", "JobID": "Jobs"}
+    ),
+    "Departments": TransactionHandler("Departments", [("DepartmentName", "string")], "insert_department"),
+    "Jobs": TransactionHandler("Jobs", [("JobTitle", "string")], "insert_job")
+}
+
+
+def validate_batch(transaction_type, transactions, existing_ids, checked=None):
+    handler = HANDLERS.get(transaction_type)
+    if handler is None:
+        return [(False, "Invalid transaction type.")] * len(transactions), [], []
+    return handler.validate(transactions, existing_ids, checked)
+
+
+# Punto de entrada de los procesos de validacion (debe poder importarse por nombre)
+def check_columns(transaction_type, transactions):
+    return HANDLERS[transaction_type].check_columns(transactions)
+
+
+# Motor de ingesta comun a /InsertData, /InsertDataStream y API_Transactional_GC
+class IngestionEngine:
+    def __init__(self, connection):
+        self.data_validator = DataValidator(connection)
+        self.data_inserter = DataInserter(connection)
+
+    # mode="bulk" escribe por chunks (una transaccion por chunk); cualquier otro valor hace commit por fila
+    # checked: resultado de check_columns calculado antes (p. ej. en un proceso de validacion)
+    def ingest(self, transaction_type, transactions, mode="bulk", chunk_size=DEFAULT_CHUNK_SIZE, checked=None):
+        with stage("validate"):
+            results, valid_positions, valid_rows = validate_batch(
+                transaction_type, transactions, self.data_validator.existing_ids, checked
+            )
+        if not valid_rows:
+            return results
+
+        with stage("insert"):
+            if mode == "bulk":
+                inserted = self.data_inserter.insert_batch(transaction_type, valid_rows, chunk_size)
+            else:
+                insert_row = getattr(self.data_inserter, HANDLERS[transaction_type].insert_method)
+                inserted = [insert_row(row) for row in valid_rows]
+        # Cada fila valida necesita su resultado; si faltara alguno, zip la dejaria marcada como exitosa sin escribirla
+        if len(inserted) != len(valid_rows):
+            raise RuntimeError(f"Insert returned {len(inserted)} results for {len(valid_rows)} {transaction_type} rows")
+        for position, result in zip(valid_positions, inserted):
+            results[position] = result
+        return results
+
+    def log_error(self, transaction_type, transaction, error_message):
+        with stage("log_errors"):
+            self.data_inserter.log_transaction_error(transaction_type, transaction, error_message)
+
+
+# Errores en orden de fila y registro de cada uno en TransactionLogs
+def log_errors(engine, transaction_type, transactions, results):
+    for transaction, (success, error_message) in zip(transactions, results):
+        if not success:
+            engine.log_error(transaction_type, transaction, error_message)
+
+
+# Cada hilo del executor "insert" puede estar en una peticion paralela con write_concurrency conexiones abiertas;
+# entre todas no deben pasar de SQL_POOL_MAX_SIZE o los shards esperan en el pool hasta SQL_POOL_ACQUIRE_TIMEOUT.
+# Con los valores por defecto (10 conexiones, 4 hilos) el limite es 2 conexiones por peticion.
+def max_write_concurrency():
+    return max(1, pool_max_size() // executor_workers("insert"))
+
+
+def _ingest_shard(connect, transaction_type, shard, chunk_size, validation_pool):
+    checked = None
+    if validation_pool is not None:
+        with stage("validate_columns"):
+            checked = validation_pool.submit(check_columns, transaction_type, shard).result()
+    with stage("connect"):
+        connection = connect()
+    try:
+        engine = IngestionEngine(connection)
+        results = engine.ingest(transaction_type, shard, "bulk", chunk_size, checked)
+        log_errors(engine, transaction_type, shard, results)
+        return results
+    finally:
+        connection.close()
+
+
+# Modo paralelo: el lote se parte en shards que se validan y escriben a la vez, cada uno en su conexion.
+# write_concurrency limita las sesiones de BD simultaneas; validation_pool (procesos) saca la validacion del GIL.
+def ingest_sharded(connect, transaction_type, transactions, shard_size=None, write_concurrency=None, chunk_size=DEFAULT_CHUNK_SIZE, validation_pool=None):
+    if transaction_type not in HANDLERS:
+        return [(False, "Invalid transaction type.")] * len(transactions)
+
+    write_concurrency = min(write_concurrency or INGEST_WRITE_CONCURRENCY, max_write_concurrency())
+    # Sin tamano explicito el lote se reparte en partes iguales entre las conexiones
+    shard_size = shard_size or INGEST_SHARD_SIZE or max(chunk_size, -(-len(transactions) // write_concurrency))
+
+    shards = [transactions[start:start + shard_size] for start in range(0, len(transactions), shard_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(write_concurrency, len(shards))), thread_name_prefix="ingest-shard") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _ingest_shard, connect, transaction_type, shard, chunk_size, validation_pool)
+            for shard in shards
+        ]
+        # Los resultados se unen en el orden de los shards, que es el orden original de las filas
+        results = []
+        for shard, future in zip(shards, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # Un shard que falla (p. ej. sin conexion) no descarta lo que escribieron los demas
+                logging.error(f"Shard of {len(shard)} {transaction_type} rows failed: {str(e)}")
+                results.extend([(False, str(e))] * len(shard))
+        return results
@@ -0,0 +1,352 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# $HOME/data es almacenamiento persistente en Azure Functions; la carpeta temporal se borra al reciclar el worker
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.expanduser("~"), "data", "globant-jobs.db"))
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+JOBS_PROGRESS_SAVE_INTERVAL = float(os.getenv("JOBS_PROGRESS_SAVE_INTERVAL", "1"))
+# Un trabajo pertenece al worker que lo tomo mientras renueve su lease; vencido, otro worker lo puede retomar
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+JOBS_CANCEL_POLL_INTERVAL = float(os.getenv("JOBS_CANCEL_POLL_INTERVAL", "1"))
+
+JOBS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS Jobs (
+    JobID TEXT PRIMARY KEY,
+    Kind TEXT NOT NULL,
+    Params TEXT NOT NULL,
+    Status TEXT NOT NULL,
+    Progress TEXT,
+    Result TEXT,
+    Error TEXT,
+    CancelRequested INTEGER NOT NULL DEFAULT 0,
+    Attempts INTEGER NOT NULL DEFAULT 0,
+    CreatedAt TEXT NOT NULL,
+    StartedAt TEXT,
+    FinishedAt TEXT,
+    Owner TEXT,
+    LeaseExpiresAt REAL
+)
+"""
+
+# Columnas agregadas despues de la primera version de la tabla
+JOBS_TABLE_MIGRATIONS = [("Owner", "TEXT"), ("LeaseExpiresAt", "REAL")]
+
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# El proceso se esta deteniendo: el trabajo queda en cola y se retoma al reiniciar
+class JobInterrupted(Exception):
+    pass
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Estado de los trabajos en una BD SQLite local, para que sobreviva a un reinicio del worker
+class JobStore:
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(JOBS_TABLE_DDL)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(Jobs)")}
+            for column, kind in JOBS_TABLE_MIGRATIONS:
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE Jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, kind, params, owner):
+        job_id = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO Jobs (JobID, Kind, Params, Status, CreatedAt, Owner, LeaseExpiresAt) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(params), _now(), owner, time.time() + JOBS_LEASE_SECONDS)
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as connection:
+            connection.execute(f"UPDATE Jobs SET {columns} WHERE JobID = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute("SELECT * FROM Jobs WHERE JobID = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    # Trabajos pendientes o a medias sin un worker vivo: sin duenio o con el lease vencido
+    def orphaned(self):
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                "SELECT * FROM Jobs WHERE Status IN ('queued', 'running') AND (Owner IS NULL OR LeaseExpiresAt IS NULL OR LeaseExpiresAt < ?) ORDER BY CreatedAt",
+                (time.time(),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Toma el trabajo solo si sigue huerfano; entre varios workers lo consigue uno solo
+    def claim(self, job_id, owner):
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE Jobs SET Owner = ?, LeaseExpiresAt = ? WHERE JobID = ? AND Status IN ('queued', 'running') AND (Owner IS NULL OR LeaseExpiresAt IS NULL OR LeaseExpiresAt < ?)",
+                (owner, time.time() + JOBS_LEASE_SECONDS, job_id, time.time())
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, owner, job_ids):
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE Jobs SET LeaseExpiresAt = ? WHERE Owner = ? AND JobID IN ({placeholders})",
+                (time.time() + JOBS_LEASE_SECONDS, owner, *job_ids)
+            )
+
+    def cancel_requested(self, job_id):
+        with self._connect() as connection:
+            row = connection.execute("SELECT CancelRequested FROM Jobs WHERE JobID = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+
+# Avance por tabla (filas, bytes, ETA); lo actualizan los hilos de backup/restore
+class JobProgress:
+    def __init__(self, job_id, store, cancel_event, stop_event):
+        self.job_id = job_id
+        self.store = store
+        self.cancel_event = cancel_event
+        self.stop_event = stop_event
+        self.tables = {}
+        self._lock = threading.Lock()
+        self._last_saved = 0.0
+        self._last_cancel_poll = time.monotonic()
+
+    def check(self):
+        # La cancelacion puede llegar a otro worker: solo queda registrada en la BD
+        now = time.monotonic()
+        if not self.cancel_event.is_set() and now - self._last_cancel_poll >= JOBS_CANCEL_POLL_INTERVAL:
+            self._last_cancel_poll = now
+            if self.store.cancel_requested(self.job_id):
+                self.cancel_event.set()
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled.")
+        if self.stop_event.is_set():
+            raise JobInterrupted(f"Job {self.job_id} was interrupted by shutdown.")
+
+    def set_total(self, table_name, total_rows):
+        with self._lock:
+            self._table(table_name)["totalRows"] = total_rows
+        self._save()
+
+    def advance(self, table_name, rows=0, size=0):
+        self.check()
+        with self._lock:
+            table = self._table(table_name)
+            table["rows"] += rows
+            table["bytes"] += size
+        self._save()
+
+    def _table(self, table_name):
+        table = self.tables.get(table_name)
+        if table is None:
+            table = {"rows": 0, "bytes": 0, "totalRows": None, "started": time.monotonic()}
+            self.tables[table_name] = table
+        return table
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for table_name, table in self.tables.items():
+                elapsed = max(time.monotonic() - table["started"], 1e-9)
+                rate = table["rows"] / elapsed
+                total = table["totalRows"]
+                eta = None
+                if total is not None and rate > 0:
+                    eta = round(max(total - table["rows"], 0) / rate, 1)
+                result[table_name] = {
+                    "rows": table["rows"],
+                    "totalRows": total,
+                    "bytes": table["bytes"],
+                    "percent": round(100 * table["rows"] / total, 1) if total else None,
+                    "rowsPerSecond": round(rate),
+                    "etaSeconds": eta
+                }
+            return result
+
+    def _save(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_saved < JOBS_PROGRESS_SAVE_INTERVAL:
+            return
+        self._last_saved = now
+        self.store.update(self.job_id, Progress=json.dumps(self.snapshot()))
+
+
+# Ejecuta backups y restores en segundo plano con concurrencia limitada (JOBS_MAX_WORKERS)
+# Sin store se abre JOBS_DB_PATH en el primer uso, no al importar el modulo (arranque en frio)
+class JobManager:
+    def __init__(self, store=None, max_workers=JOBS_MAX_WORKERS):
+        self._store = store
+        self.max_workers = max_workers
+        self.handlers = {}
+        # Identifica a este proceso como duenio de los trabajos que toma
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = None
+        self._heartbeat = None
+        self._cancel_events = {}
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        with self._lock:
+            if self._store is None:
+                self._store = JobStore(JOBS_DB_PATH)
+            return self._store
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+            return self._executor
+
+    # Renueva los leases de los trabajos propios y retoma los que dejo otro worker que ya no los renueva
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stop_event.wait(JOBS_LEASE_SECONDS / 3):
+            try:
+                with self._lock:
+                    job_ids = list(self._cancel_events)
+                self.store.renew(self.worker_id, job_ids)
+                self._requeue_orphans()
+            except Exception as e:
+                logging.error(f"Job heartbeat failed: {str(e)}")
+
+    # Reencola los trabajos que quedaron pendientes o a medias en un worker detenido (reinicio o caida)
+    def start(self):
+        self._stop_event.clear()
+        self._requeue_orphans()
+        self._start_heartbeat()
+
+    def _requeue_orphans(self):
+        for job in self.store.orphaned():
+            if not self.store.claim(job["JobID"], self.worker_id):
+                continue
+            if job["CancelRequested"]:
+                self.store.update(job["JobID"], Status="cancelled", FinishedAt=_now())
+                continue
+            logging.info(f"Requeuing {job['Kind']} job {job['JobID']} ({job['Status']}).")
+            self.store.update(job["JobID"], Status="queued")
+            self._submit(job["JobID"], job["Kind"], json.loads(job["Params"]))
+
+    def submit(self, kind, params):
+        job_id = self.store.create(kind, params, self.worker_id)
+        self._submit(job_id, kind, params)
+        return job_id
+
+    def _submit(self, job_id, kind, params):
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._start_heartbeat()
+        self._get_executor().submit(self._run, job_id, kind, params)
+
+    def cancel(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or job["Status"] in FINAL_STATUSES:
+            return job
+        self.store.update(job_id, CancelRequested=1)
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        if cancel_event is not None:
+            cancel_event.set()
+        return self.store.get(job_id)
+
+    def status(self, job_id):
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return {
+            "jobId": job["JobID"],
+            "kind": job["Kind"],
+            "params": json.loads(job["Params"]),
+            "status": job["Status"],
+            "cancelRequested": bool(job["CancelRequested"]),
+            "attempts": job["Attempts"],
+            "owner": job["Owner"],
+            "createdAt": job["CreatedAt"],
+            "startedAt": job["StartedAt"],
+            "finishedAt": job["FinishedAt"],
+            "progress": json.loads(job["Progress"]) if job["Progress"] else {},
+            "result": json.loads(job["Result"]) if job["Result"] else None,
+            "error": job["Error"]
+        }
+
+    def _run(self, job_id, kind, params):
+        with self._lock:
+            cancel_event = self._cancel_events[job_id]
+        job = self.store.get(job_id)
+        if job["CancelRequested"]:
+            cancel_event.set()
+
+        progress = JobProgress(job_id, self.store, cancel_event, self._stop_event)
+        try:
+            progress.check()
+            self.store.update(job_id, Status="running", StartedAt=_now(), Attempts=job["Attempts"] + 1)
+            result = self.handlers[kind](params, progress)
+            if cancel_event.is_set():
+                status = "cancelled"
+            elif self._stop_event.is_set():
+                raise JobInterrupted(f"Job {job_id} was interrupted by shutdown.")
+            else:
+                # Una sola tabla devuelve un dict; "all" devuelve una lista con uno por tabla
+                items = result if isinstance(result, list) else [result]
+                failed = any(isinstance(item, dict) and item.get("status") == "error" for item in items)
+                status = "failed" if failed else "succeeded"
+            self.store.update(job_id, Status=status, Result=json.dumps(result, default=str), FinishedAt=_now())
+        except JobCancelled as e:
+            self.store.update(job_id, Status="cancelled", Error=str(e), FinishedAt=_now())
+        except JobInterrupted:
+            logging.info(f"Job {job_id} interrupted, it will be requeued on restart.")
+            self.store.update(job_id, Status="queued", Owner=None, LeaseExpiresAt=None)
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            self.store.update(job_id, Status="failed", Error=str(e), FinishedAt=_now())
+        finally:
+            progress._save(force=True)
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    # Los trabajos en curso se detienen en el siguiente lote y quedan en cola para el proximo arranque
+    def shutdown(self, wait=True):
+        self._stop_event.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+job_manager = JobManager(max_workers=JOBS_MAX_WORKERS)
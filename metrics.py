@@ -0,0 +1,171 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.kind = "counter"
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram:
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.kind = "histogram"
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][position] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, entry in self._values.items():
+                for bound, count in zip(self.buckets, entry["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {entry['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {entry['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {entry['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, description):
+        metric = Counter(name, description)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, description, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    # Formato de texto de Prometheus (version 0.0.4)
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram("globant_http_request_duration_seconds", "HTTP request duration by endpoint.")
+stage_duration = registry.histogram("globant_stage_duration_seconds", "Duration of each processing stage.")
+db_roundtrips = registry.counter("globant_db_roundtrips_total", "Statements sent to the database.")
+db_rows_affected = registry.counter("globant_db_rows_affected_total", "Rows affected by INSERT/UPDATE/DELETE statements.")
+db_connection_acquire = registry.histogram("globant_db_connection_acquire_seconds", "Time spent waiting for a pooled connection.")
+blob_bytes = registry.counter("globant_blob_bytes_total", "Bytes transferred to and from blob storage.")
+
+# Desglose por etapa de la peticion actual (lo copian los hilos de run_blocking)
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def start_request():
+    stages = {}
+    _request_stages.set(stages)
+    return stages
+
+
+def record_stage(name, seconds):
+    stage_duration.observe(seconds, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def log_slow_request(method, path, status, seconds, stages):
+    if SLOW_REQUEST_MS <= 0 or seconds * 1000 < SLOW_REQUEST_MS:
+        return
+    breakdown = ", ".join(f"{name}={value * 1000:.1f}ms" for name, value in sorted(stages.items(), key=lambda item: -item[1]))
+    logging.warning(f"Slow request {method} {path} ({status}) took {seconds * 1000:.1f}ms: {breakdown or 'no stages recorded'}")
+
+
+# Cursor que cuenta viajes a la BD y filas afectadas; el resto se delega al cursor de pyodbc
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def execute(self, query, *params):
+        result = self._cursor.execute(query, *params)
+        self._count("execute")
+        return result
+
+    def executemany(self, query, params):
+        result = self._cursor.executemany(query, params)
+        self._count("executemany")
+        return result
+
+    def _count(self, operation):
+        db_roundtrips.inc(operation=operation)
+        rowcount = getattr(self._cursor, "rowcount", -1)
+        if rowcount and rowcount > 0:
+            db_rows_affected.inc(rowcount)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
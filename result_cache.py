@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class CacheEntry:
+    def __init__(self, value, expires, generation):
+        self.value = value
+        self.expires = expires
+        self.generation = generation
+        self.etag = compute_etag(value)
+        # Cuerpo ya codificado por formato de respuesta (JSON, columnar, msgpack, Arrow)
+        self.encoded = {}
+
+
+def compute_etag(value):
+    payload = json.dumps(value, default=str, sort_keys=True).encode("utf-8")
+    return f'"{hashlib.sha1(payload).hexdigest()}"'
+
+
+# Cache en memoria con TTL, limite de entradas (LRU) y una sola consulta a la BD por clave a la vez
+class ResultCache:
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic() and entry.generation == self._generation:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+            self._misses += 1
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = Future()
+                self._inflight[key] = inflight
+                generation = self._generation
+
+        # Las demas peticiones esperan el resultado de la que ya esta consultando
+        if not owner:
+            return inflight.result()
+
+        try:
+            entry = CacheEntry(loader(), time.monotonic() + self.ttl, generation)
+        except Exception as e:
+            with self._lock:
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+            inflight.set_exception(e)
+            raise
+
+        with self._lock:
+            if self._inflight.get(key) is inflight:
+                del self._inflight[key]
+            # Si hubo una escritura mientras se consultaba, el resultado no se guarda
+            if generation == self._generation:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        inflight.set_result(entry)
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._inflight.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "generation": self._generation
+            }
+
+
+reporting_cache = ResultCache(
+    int(os.getenv("REPORTING_CACHE_TTL", "60")),
+    int(os.getenv("REPORTING_CACHE_MAX_ENTRIES", "128"))
+)
@@ -0,0 +1,34 @@
+# Los tests usan los reemplazos locales de benchmarks/standins.py: SQLite en vez de SQL Server y una carpeta en vez de Blob Storage
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+_workdir = tempfile.mkdtemp(prefix="globant-tests-")
+os.environ.setdefault("ENVIRONMENT", "AZURE")
+os.environ["JOBS_DB_PATH"] = os.path.join(_workdir, "jobs.db")
+os.environ["TRANSACTION_LOG_ASYNC"] = "false"
+
+import datagen
+import standins
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "globant.db")
+    standins.create_database(path)
+    datagen.seed_database(path, 0)
+    standins.install(path, str(tmp_path / "blobs"))
+    return path
+
+
+@pytest.fixture
+def function_app(database):
+    import function_app
+    standins.install(database, os.path.dirname(database) + "/blobs")
+    function_app.reporting_cache.invalidate()
+    return function_app
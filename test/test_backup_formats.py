@@ -0,0 +1,28 @@
+import pytest
+
+from backup_formats import backup_codec
+
+
+@pytest.mark.parametrize("env, format_name, codec", [
+    ({"BACKUP_CODEC": "deflate"}, "parquet", "snappy"),
+    ({"BACKUP_CODEC": "deflate"}, "arrow", "zstd"),
+    ({"BACKUP_CODEC": "Snappy"}, "avro", "snappy"),
+    ({"BACKUP_FORMAT": "parquet", "BACKUP_CODEC": "zstd"}, "parquet", "zstd"),
+    ({"BACKUP_FORMAT": "parquet", "BACKUP_CODEC": "zstd"}, "avro", "deflate"),
+    ({}, "avro", "deflate")
+])
+def test_env_codec_only_applies_to_the_env_format(monkeypatch, env, format_name, codec):
+    monkeypatch.delenv("BACKUP_FORMAT", raising=False)
+    monkeypatch.delenv("BACKUP_CODEC", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert backup_codec(format_name) == codec
+
+
+def test_requested_format_without_codec_is_accepted(database, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from api_datamanagement_gc import DataBackup
+
+    monkeypatch.setenv("BACKUP_CODEC", "deflate")
+    backup = DataBackup(format_name="parquet")
+    assert (backup.format, backup.codec) == ("parquet", "snappy")
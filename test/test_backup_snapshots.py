@@ -0,0 +1,73 @@
+import os
+import sqlite3
+
+import datagen
+from api_datamanagement_gc import DataBackup, DataRestore, chain_blob_name, read_json_blob
+
+
+def _employees(database):
+    connection = sqlite3.connect(database)
+    # Las partes se restauran en paralelo: EmployeeID no se conserva, se comparan los datos
+    rows = sorted(connection.execute("SELECT FirstName, LastName, HireDate, JobID, DepartmentID FROM HiredEmployees").fetchall())
+    connection.close()
+    return rows
+
+
+def _replace_employees(database, count, seed):
+    connection = sqlite3.connect(database)
+    connection.execute("DELETE FROM HiredEmployees")
+    connection.executemany(
+        "INSERT INTO HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
+        [tuple(row.values()) for row in datagen.hired_employees(count, 12, 183, seed)]
+    )
+    connection.commit()
+    connection.close()
+
+
+def test_failed_full_backup_keeps_the_previous_one(database, monkeypatch):
+    _replace_employees(database, 400, seed=1)
+    first = DataBackup().backup_table("HiredEmployees")
+    assert first["status"] == "success" and first["parts"] == 4
+    expected = _employees(database)
+
+    # El segundo respaldo completo falla en una de sus cuatro partes
+    _replace_employees(database, 400, seed=2)
+    export_part = DataBackup._export_part
+
+    def failing_export(self, table_name, blob_name, *args):
+        if blob_name.endswith("part0002.avro"):
+            raise IOError("upload failed")
+        return export_part(self, table_name, blob_name, *args)
+
+    monkeypatch.setattr(DataBackup, "_export_part", failing_export)
+    backup = DataBackup()
+    chain_before = read_json_blob(backup.blob_service_client, backup.container_name, chain_blob_name("HiredEmployees"))
+    assert backup.backup_table("HiredEmployees")["status"] == "error"
+    assert read_json_blob(backup.blob_service_client, backup.container_name, chain_blob_name("HiredEmployees")) == chain_before
+    monkeypatch.undo()
+
+    # No quedan partes sueltas del respaldo fallido y el anterior se restaura completo
+    blobs = os.listdir(os.path.join(os.path.dirname(database), "blobs", "backups"))
+    assert len([name for name in blobs if ".part" in name and not name.endswith(".checkpoint.json")]) == 4
+
+    connection = sqlite3.connect(database)
+    connection.execute("DELETE FROM HiredEmployees")
+    connection.commit()
+    connection.close()
+    result = DataRestore().restore_table("HiredEmployees")
+    assert result["status"] == "success" and result["rows"] == 400
+    assert _employees(database) == expected
+
+
+def test_full_backup_replaces_the_previous_set(database):
+    _replace_employees(database, 100, seed=1)
+    assert DataBackup().backup_table("HiredEmployees")["status"] == "success"
+    assert DataBackup().backup_table("HiredEmployees")["status"] == "success"
+
+    backup = DataBackup()
+    chain = read_json_blob(backup.blob_service_client, backup.container_name, chain_blob_name("HiredEmployees"))
+    assert len(chain["entries"]) == 1
+    blobs = os.listdir(os.path.join(os.path.dirname(database), "blobs", "backups"))
+    assert sorted(name for name in blobs if name.startswith("HiredEmployees_full_")) == sorted(
+        [chain["entries"][0]["manifest"]] + [name for name in blobs if name.startswith(chain["entries"][0]["manifest"][:-len(".manifest.json")] + ".part")]
+    )
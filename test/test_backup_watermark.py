@@ -0,0 +1,77 @@
+import sqlite3
+
+import datagen
+from api_datamanagement_gc import DataBackup, DataRestore, chain_blob_name, read_json_blob
+
+
+def _execute(database, statement, rows=()):
+    connection = sqlite3.connect(database)
+    connection.executemany(statement, rows) if rows else connection.execute(statement)
+    connection.commit()
+    connection.close()
+
+
+def _employees(database):
+    connection = sqlite3.connect(database)
+    rows = sorted(connection.execute("SELECT FirstName, LastName, HireDate, JobID, DepartmentID FROM HiredEmployees").fetchall())
+    connection.close()
+    return rows
+
+
+def _hire(index):
+    return tuple(next(iter(datagen.hired_employees(1, 12, 183, seed=100 + index))).values())
+
+
+def _seed(database, count):
+    _execute(
+        database, "INSERT INTO HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)",
+        [tuple(row.values()) for row in datagen.hired_employees(count, 12, 183, 1)]
+    )
+
+
+def _restore_into_empty_table(database):
+    _execute(database, "DELETE FROM HiredEmployees")
+    assert DataRestore().restore_table("HiredEmployees")["status"] == "success"
+
+
+def test_incremental_backup_after_a_restore_is_full(database):
+    _seed(database, 50)
+    assert DataBackup().backup_table("HiredEmployees")["kind"] == "full"
+    _restore_into_empty_table(database)
+
+    backup = DataBackup()
+    assert backup._read_chain("HiredEmployees")["fullRequired"] is True
+    result = backup.backup_table("HiredEmployees", "incremental")
+    assert result["kind"] == "full" and result["rows"] == 50
+    assert "fullRequired" not in backup._read_chain("HiredEmployees")
+
+    # A partir del respaldo completo nuevo los deltas vuelven a funcionar
+    _execute(database, "INSERT INTO HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)", [_hire(0)])
+    result = backup.backup_table("HiredEmployees", "incremental")
+    assert result["kind"] == "delta" and result["rows"] == 1
+
+
+def test_rows_committed_below_the_watermark_are_picked_up(database):
+    _seed(database, 50)
+    # EmployeeID 40 se "confirma" despues del respaldo: no esta al leer la marca de agua
+    connection = sqlite3.connect(database)
+    late = connection.execute("SELECT FirstName, LastName, HireDate, JobID, DepartmentID FROM HiredEmployees WHERE EmployeeID = 40").fetchone()
+    connection.execute("DELETE FROM HiredEmployees WHERE EmployeeID = 40")
+    connection.commit()
+    connection.close()
+
+    backup = DataBackup()
+    assert backup.backup_table("HiredEmployees")["rows"] == 49
+    _execute(database, "INSERT INTO HiredEmployees (EmployeeID, FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?, ?)", [(40,) + late])
+    _execute(database, "INSERT INTO HiredEmployees (FirstName, LastName, HireDate, JobID, DepartmentID) VALUES (?, ?, ?, ?, ?)", [_hire(1)])
+
+    result = backup.backup_table("HiredEmployees", "incremental")
+    assert result["kind"] == "delta" and result["rows"] == 2
+    # Ya respaldadas, no se vuelven a exportar
+    assert backup.backup_table("HiredEmployees", "incremental")["rows"] == 0
+
+    expected = _employees(database)
+    _restore_into_empty_table(database)
+    assert _employees(database) == expected
+    chain = read_json_blob(backup.blob_service_client, backup.container_name, chain_blob_name("HiredEmployees"))
+    assert len(chain["entries"]) == 2
@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ingestion import IngestionEngine
+
+ROWS = [{"DepartmentName": "Research"}, {"DepartmentName": "Support"}]
+
+
+def _count(database, table_name):
+    connection = sqlite3.connect(database)
+    count = connection.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    connection.close()
+    return count
+
+
+@pytest.mark.parametrize("body", [
+    {"chunkSize": 0},
+    {"chunkSize": -1},
+    {"chunkSize": "abc"},
+    {"mode": "parallel", "shardSize": -5},
+    {"mode": "parallel", "writeConcurrency": 0}
+])
+def test_insert_data_rejects_non_positive_sizes(function_app, database, body):
+    client = TestClient(function_app.app)
+    response = client.post("/InsertData", json={"transactionType": "Departments", "transactions": ROWS, "mode": "bulk", **body})
+    assert response.status_code == 400
+    assert _count(database, "Departments") == 12
+
+
+def test_insert_data_stream_rejects_non_positive_chunk_size(function_app):
+    client = TestClient(function_app.app)
+    response = client.post("/InsertDataStream?transactionType=Departments&chunkSize=0", content=b'{"DepartmentName": "Research"}\n')
+    assert response.status_code == 400
+
+
+def test_ingest_fails_when_rows_are_missing_results(database):
+    from api_transactional_gc import DatabaseConnection
+
+    connection = DatabaseConnection().connect()
+    try:
+        engine = IngestionEngine(connection)
+        engine.data_inserter.insert_batch = lambda transaction_type, rows, chunk_size: []
+        with pytest.raises(RuntimeError):
+            engine.ingest("Departments", ROWS)
+    finally:
+        connection.close()
@@ -0,0 +1,58 @@
+import json
+import socket
+import sqlite3
+import threading
+import time
+
+import httpx
+import uvicorn
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Servidor uvicorn real: httpx.ASGITransport no reproduce como uvicorn entrega el cuerpo mientras se responde
+def _serve(app):
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "uvicorn did not start"
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def test_insert_data_stream_through_uvicorn(function_app, database):
+    lines = [json.dumps({"DepartmentName": f"Department {index}"}) for index in range(25)]
+    lines.insert(10, "not json")
+    lines.insert(20, json.dumps({"DepartmentName": None}))
+
+    def body():
+        for line in lines:
+            yield (line + "\n").encode("utf-8")
+
+    server, thread, url = _serve(function_app.app)
+    try:
+        response = httpx.post(
+            f"{url}/InsertDataStream", params={"transactionType": "Departments", "chunkSize": 10},
+            headers={"Accept": "application/x-ndjson"}, content=body(), timeout=30
+        )
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["offset"] for result in results[:-1]] == [0, 10, 20]
+    assert results[-1] == {"summary": {"rows": 27, "successCount": 25, "failureCount": 2}}
+    errors = [error["row"] for result in results[:-1] for error in result["errors"]]
+    assert errors == [10, 20]
+
+    connection = sqlite3.connect(database)
+    assert connection.execute("SELECT COUNT(*) FROM Departments WHERE DepartmentName LIKE 'Department %'").fetchone()[0] == 12 + 25
+    connection.close()
@@ -0,0 +1,29 @@
+import sqlite3
+
+import api_transactional_gc
+import database_connection
+from api_transactional_gc import DataInserter
+
+EMPLOYEE = {"FirstName": "Ada", "LastName": "Lovelace", "HireDate": "2021-03-01T00:00:00Z", "JobID": 1, "DepartmentID": 1}
+
+
+def test_failed_row_insert_is_not_committed_by_the_next_one(database, monkeypatch):
+    connection = database_connection.DatabaseConnection().connect()
+    try:
+        inserter = DataInserter(connection)
+        apply_hires = api_transactional_gc.apply_hires
+
+        def failing_apply_hires(cursor, rows):
+            raise RuntimeError("aggregate update failed")
+
+        monkeypatch.setattr(api_transactional_gc, "apply_hires", failing_apply_hires)
+        assert inserter.insert_hired_employee(EMPLOYEE) == (False, "aggregate update failed")
+
+        monkeypatch.setattr(api_transactional_gc, "apply_hires", apply_hires)
+        assert inserter.insert_department({"DepartmentName": "Research"}) == (True, None)
+    finally:
+        connection.close()
+
+    check = sqlite3.connect(database)
+    assert check.execute("SELECT COUNT(*) FROM HiredEmployees").fetchone()[0] == 0
+    check.close()
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import jobs
+from jobs import JobManager, JobStore
+
+
+def _wait(manager, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["status"] in jobs.FINAL_STATUSES:
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {manager.status(job_id)}")
+
+
+def test_single_table_error_marks_the_job_failed(tmp_path):
+    manager = JobManager(JobStore(str(tmp_path / "jobs.db")), 1)
+    manager.register("backup", lambda params, progress: {"table": "Jobs", "status": "error", "error": "boom"})
+    try:
+        assert _wait(manager, manager.submit("backup", {}))["status"] == "failed"
+    finally:
+        manager.shutdown()
+
+
+def test_start_leaves_jobs_leased_by_another_worker(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    live = store.create("backup", {}, "other-worker")
+    store.update(live, Status="running")
+    expired = store.create("backup", {}, "crashed-worker")
+    store.update(expired, Status="running", LeaseExpiresAt=time.time() - 1)
+
+    manager = JobManager(store, 1)
+    manager.register("backup", lambda params, progress: [{"table": "Jobs", "status": "ok"}])
+    try:
+        manager.start()
+        assert _wait(manager, expired)["status"] == "succeeded"
+        assert manager.status(expired)["owner"] == manager.worker_id
+        assert manager.status(live)["status"] == "running"
+        assert manager.status(live)["owner"] == "other-worker"
+    finally:
+        manager.shutdown()
+
+
+def test_cancel_from_another_worker_stops_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_CANCEL_POLL_INTERVAL", 0)
+    path = str(tmp_path / "jobs.db")
+    started = threading.Event()
+
+    def handler(params, progress):
+        started.set()
+        while True:
+            progress.check()
+            time.sleep(0.01)
+
+    manager = JobManager(JobStore(path), 1)
+    manager.register("backup", handler)
+    try:
+        job_id = manager.submit("backup", {})
+        assert started.wait(5)
+        # Otro proceso solo comparte la BD de trabajos, no los eventos en memoria
+        JobManager(JobStore(path), 1).cancel(job_id)
+        assert _wait(manager, job_id)["status"] == "cancelled"
+    finally:
+        manager.shutdown()
+
+
+def test_store_is_created_on_first_use(tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    env.pop("JOBS_DB_PATH", None)
+    script = "import os, jobs; print(os.listdir(os.environ['HOME'])); jobs.job_manager.status('missing'); print(os.listdir(os.environ['HOME']))"
+    output = subprocess.run([sys.executable, "-c", script], env=env, cwd=os.path.dirname(jobs.__file__), capture_output=True, text=True, check=True)
+    assert output.stdout.split("\n")[:2] == ["[]", "['data']"]
+    assert os.path.exists(tmp_path / "data" / "globant-jobs.db")
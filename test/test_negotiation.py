@@ -0,0 +1,33 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import datagen
+
+COLUMNAR = "application/vnd.globant.columnar+json"
+
+
+def test_metrics_accepts_text_plain(function_app):
+    response = TestClient(function_app.app).get("/metrics", headers={"Accept": "text/plain"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_json_routes_still_reject_unknown_formats(function_app):
+    response = TestClient(function_app.app).get("/PoolStats", headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+
+
+def test_streamed_report_honors_accept(function_app):
+    client = TestClient(function_app.app)
+    hires = list(datagen.hired_employees(300, 12, 183, seed=1))
+    client.post("/InsertData", json={"transactionType": "HiredEmployees", "transactions": hires, "mode": "bulk"})
+    streamed = client.get("/DepartmentsAboveAverage", params={"stream": "true"})
+    assert streamed.headers["content-type"] == "application/json"
+
+    columnar = client.get("/DepartmentsAboveAverage", params={"stream": "true"}, headers={"Accept": COLUMNAR})
+    assert columnar.status_code == 200
+    assert columnar.headers["content-type"] == COLUMNAR
+    body = columnar.json()
+    assert body["rows"]
+    assert [dict(zip(body["columns"], row)) for row in body["rows"]] == json.loads(streamed.text)
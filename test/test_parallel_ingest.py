@@ -0,0 +1,42 @@
+import threading
+import time
+
+import database_connection
+import datagen
+from ingestion import ingest_sharded, max_write_concurrency
+
+
+def test_write_concurrency_is_clamped_to_the_pool(database, monkeypatch):
+    monkeypatch.setenv("SQL_POOL_MAX_SIZE", "6")
+    monkeypatch.setenv("EXECUTOR_INSERT_WORKERS", "3")
+    assert max_write_concurrency() == 2
+
+    lock = threading.Lock()
+    open_connections = 0
+    peak = 0
+
+    class CountingConnection:
+        def __init__(self, connection):
+            self._connection = connection
+
+        def close(self):
+            nonlocal open_connections
+            with lock:
+                open_connections -= 1
+            self._connection.close()
+
+        def __getattr__(self, name):
+            return getattr(self._connection, name)
+
+    def connect():
+        nonlocal open_connections, peak
+        with lock:
+            open_connections += 1
+            peak = max(peak, open_connections)
+        time.sleep(0.02)
+        return CountingConnection(database_connection.DatabaseConnection().connect())
+
+    transactions = list(datagen.hired_employees(400, 12, 183))
+    results = ingest_sharded(connect, "HiredEmployees", transactions, shard_size=50, write_concurrency=8, chunk_size=50)
+    assert results == [(True, None)] * 400
+    assert peak == 2
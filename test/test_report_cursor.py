@@ -0,0 +1,46 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import datagen
+
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor", ["WzFd", "not-base64!", _cursor({"a": 1}), _cursor([1, 2, 3, 4]), _cursor([None]), _cursor([[1]])])
+def test_malformed_cursor_is_rejected(function_app, cursor):
+    response = TestClient(function_app.app).get("/DepartmentsAboveAverage", params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_next_cursor_pages_through_the_report(function_app):
+    client = TestClient(function_app.app)
+    hires = list(datagen.hired_employees(300, 12, 183, seed=1))
+    client.post("/InsertData", json={"transactionType": "HiredEmployees", "transactions": hires, "mode": "bulk"})
+    full = client.get("/EmployeeHiresByQuarter").json()
+
+    rows, cursor = [], None
+    while True:
+        params = {"limit": 50} if cursor is None else {"limit": 50, "cursor": cursor}
+        page = client.get("/EmployeeHiresByQuarter", params=params).json()
+        rows.extend(page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert rows == full
+
+
+def test_cursor_without_limit_is_rejected_and_not_cached(function_app):
+    client = TestClient(function_app.app)
+    hires = list(datagen.hired_employees(300, 12, 183, seed=1))
+    client.post("/InsertData", json={"transactionType": "HiredEmployees", "transactions": hires, "mode": "bulk"})
+    full = client.get("/EmployeeHiresByQuarter").json()
+    function_app.reporting_cache.invalidate()
+
+    cursor = client.get("/EmployeeHiresByQuarter", params={"limit": 5}).json()["nextCursor"]
+    assert client.get("/EmployeeHiresByQuarter", params={"cursor": cursor}).status_code == 400
+    assert client.get("/EmployeeHiresByQuarter").json() == full
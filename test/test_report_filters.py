@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api_reporting_gc import MAX_FILTER_IDS, filter_predicate, report_filters
+
+HIRE = {"FirstName": "Ada", "LastName": "Lovelace", "JobID": 1, "DepartmentID": 1}
+
+
+def test_last_year_has_no_upper_bound():
+    predicate, params = filter_predicate(report_filters(year=9999, quarter_from=3), "base")
+    assert predicate == "HireDate >= ?"
+    assert len(params) == 1
+    predicate, params = filter_predicate(report_filters(year=9999, quarter_to=3), "base")
+    assert predicate == "HireDate >= ? AND HireDate < ?"
+
+
+@pytest.mark.parametrize("path", ["/EmployeeHiresByQuarter", "/DepartmentsAboveAverage"])
+def test_year_9999_is_reported(function_app, path):
+    client = TestClient(function_app.app)
+    client.post("/InsertData", json={"transactionType": "HiredEmployees", "transactions": [dict(HIRE, HireDate="9999-11-15T00:00:00Z")]})
+    response = client.get(path, params={"year": 9999})
+    assert response.status_code == 200
+    if path == "/EmployeeHiresByQuarter":
+        assert [row["Q4"] for row in response.json()] == [1]
+
+
+@pytest.mark.parametrize("param", ["department", "job"])
+def test_too_many_filter_ids_are_rejected(function_app, param):
+    client = TestClient(function_app.app)
+    ids = list(range(1, MAX_FILTER_IDS + 2))
+    assert client.get("/DepartmentsAboveAverage", params={param: ids}).status_code == 400
+    assert client.get("/DepartmentsAboveAverage", params={param: ids[:MAX_FILTER_IDS]}).status_code == 200
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from api_datamanagement_gc import DataBackup, DataRestore, checkpoint_blob_name
+
+
+class FakeProgress:
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def set_total(self, table_name, total_rows):
+        pass
+
+    def advance(self, table_name, rows=0, size=0):
+        pass
+
+    def check(self):
+        pass
+
+
+def _clear(database, table_name):
+    connection = sqlite3.connect(database)
+    connection.execute("PRAGMA foreign_keys = OFF")
+    connection.execute(f"DELETE FROM {table_name}")
+    connection.commit()
+    connection.close()
+
+
+def _count(database, table_name):
+    connection = sqlite3.connect(database)
+    count = connection.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    connection.close()
+    return count
+
+
+def _part(restore, table_name):
+    parts, _ = restore._part_blobs(table_name)
+    assert len(parts) == 1
+    return parts[0]
+
+
+def _write_checkpoint(restore, part, rows, **overrides):
+    checkpoint = {"sha256": part["sha256"], "createdAt": part["createdAt"], "jobId": None, "rows": rows}
+    checkpoint.update(overrides)
+    client = restore.blob_service_client.get_blob_client(container=restore.container_name, blob=checkpoint_blob_name(part["blob"]))
+    client.upload_blob(json.dumps(checkpoint).encode("utf-8"), overwrite=True)
+
+
+def test_checkpoint_of_another_backup_is_ignored(database):
+    assert DataBackup().backup_table("Departments")["status"] == "success"
+    restore = DataRestore()
+    part = _part(restore, "Departments")
+    _write_checkpoint(restore, part, 5, sha256="0" * 64, createdAt="2000-01-01T00:00:00+00:00")
+
+    _clear(database, "Departments")
+    result = restore.restore_table("Departments", resume=True)
+    assert result["status"] == "success"
+    assert result["rows"] == 12
+    assert _count(database, "Departments") == 12
+
+
+def test_checkpoint_is_only_resumed_on_request_or_by_the_same_job(database):
+    assert DataBackup().backup_table("Departments")["status"] == "success"
+    restore = DataRestore()
+    part = _part(restore, "Departments")
+
+    # Otra restauracion del mismo respaldo: sin resume se empieza de cero
+    _write_checkpoint(restore, part, 5, jobId="other-job")
+    assert DataRestore(FakeProgress("new-job"))._read_checkpoint(
+        restore.blob_service_client.get_blob_client(container=restore.container_name, blob=checkpoint_blob_name(part["blob"])),
+        {"sha256": part["sha256"], "createdAt": part["createdAt"], "jobId": "new-job"}, False
+    ) == 0
+
+    # El mismo trabajo, reencolado, retoma su checkpoint
+    _clear(database, "Departments")
+    connection = sqlite3.connect(database)
+    connection.executemany("INSERT INTO Departments (DepartmentID, DepartmentName) VALUES (?, ?)", [(index, f"Department {index}") for index in range(1, 6)])
+    connection.commit()
+    connection.close()
+    _write_checkpoint(restore, part, 5, jobId="job-1")
+    result = DataRestore(FakeProgress("job-1")).restore_table("Departments")
+    assert result["status"] == "success"
+    assert result["rows"] == 7
+    assert _count(database, "Departments") == 12
+
+
+def test_restore_rejects_a_malformed_until(function_app):
+    client = TestClient(function_app.app)
+    for wait in (True, False):
+        response = client.post("/RestoreData", json={"tableName": "Departments", "until": "garbage", "wait": wait})
+        assert response.status_code == 400
+    assert client.post("/RestoreData", json={"tableName": "Departments", "until": 20240101, "wait": True}).status_code == 400
@@ -0,0 +1,50 @@
+import standins
+from api_datamanagement_gc import DataBackup, DataRestore
+
+
+def _record_identity_insert(monkeypatch):
+    statements = []
+    execute = standins.SQLiteCursor.execute
+
+    def recording_execute(self, query, *params):
+        if query.startswith("SET IDENTITY_INSERT"):
+            statements.append(query)
+        return execute(self, query, *params)
+
+    monkeypatch.setattr(standins.SQLiteCursor, "execute", recording_execute)
+    return statements
+
+
+def test_failed_restore_turns_identity_insert_off(database, monkeypatch):
+    assert DataBackup().backup_table("Departments")["status"] == "success"
+    statements = _record_identity_insert(monkeypatch)
+
+    def cancelled(*args):
+        raise RuntimeError("cancelled")
+
+    restore = DataRestore()
+    monkeypatch.setattr(restore, "_report_progress", cancelled)
+    assert restore.restore_table("Departments")["status"] == "error"
+    assert statements == ["SET IDENTITY_INSERT GlobantPoc.Departments ON", "SET IDENTITY_INSERT GlobantPoc.Departments OFF"]
+
+
+def test_connection_is_discarded_when_identity_insert_cannot_be_turned_off(database, monkeypatch):
+    assert DataBackup().backup_table("Departments")["status"] == "success"
+    connections = []
+    connect = standins.SQLiteDatabaseConnection.connect
+    execute = standins.SQLiteCursor.execute
+
+    def tracking_connect(self):
+        connection = connect(self)
+        connections.append(connection)
+        return connection
+
+    def failing_execute(self, query, *params):
+        if query.endswith(" OFF"):
+            raise RuntimeError("connection lost")
+        return execute(self, query, *params)
+
+    monkeypatch.setattr(standins.SQLiteDatabaseConnection, "connect", tracking_connect)
+    monkeypatch.setattr(standins.SQLiteCursor, "execute", failing_execute)
+    DataRestore().restore_table("Departments")
+    assert [getattr(connection, "broken", False) for connection in connections] == [True]
@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+import validation_throughput
+from ingestion import HANDLERS, validate_batch
+
+# Margen amplio sobre lo que mide benchmarks/validation_throughput.py (unas 200 000 filas/s en un portatil)
+MIN_ROWS_PER_SECOND = 50000
+
+HIRE = {"FirstName": "Ada", "LastName": "Lovelace", "HireDate": "2021-03-01T00:00:00Z", "JobID": 1, "DepartmentID": 1}
+
+
+def _existing_ids(table, ids):
+    return validation_throughput.existing_ids(table, ids)
+
+
+def _validate(*transactions, transaction_type="HiredEmployees"):
+    return validate_batch(transaction_type, list(transactions), _existing_ids)
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("JobID", "7", 7),
+    ("JobID", 7.0, 7),
+    ("FirstName", 42, "42"),
+    ("FirstName", 1.5, "1.5"),
+    ("HireDate", "2021-03-01", "2021-03-01"),
+    ("HireDate", date(2021, 3, 1), "2021-03-01"),
+    ("HireDate", datetime(2021, 3, 1, 9, 30), "2021-03-01T09:30:00")
+])
+def test_values_are_coerced(field, value, expected):
+    results, positions, rows = _validate(dict(HIRE, **{field: value}))
+    assert results == [(True, None)]
+    assert positions == [0]
+    assert rows[0][field] == expected
+
+
+@pytest.mark.parametrize("field, value, error", [
+    ("JobID", "abc", "JobID must be an integer."),
+    ("JobID", 7.5, "JobID must be an integer."),
+    ("DepartmentID", True, "DepartmentID must be an integer."),
+    ("HireDate", "not a date", "HireDate must be an ISO 8601 date."),
+    ("HireDate", 20210301, "HireDate must be an ISO 8601 date."),
+    ("LastName", ["Lovelace"], "LastName must be a string."),
+    ("FirstName", None, "FirstName is missing or null."),
+    ("DepartmentID", 13, "DepartmentID does not exist in Departments."),
+    ("JobID", 184, "JobID does not exist in Jobs.")
+])
+def test_invalid_values_are_reported(field, value, error):
+    results, positions, rows = _validate(dict(HIRE, **{field: value}))
+    assert results == [(False, error)]
+    assert positions == [] and rows == []
+
+
+def test_missing_field_and_non_objects_are_rejected():
+    hire = dict(HIRE)
+    del hire["LastName"]
+    results, positions, _ = _validate(hire, ["Ada"], "Ada", None, HIRE)
+    assert results == [
+        (False, "LastName is missing or null."),
+        (False, "Transaction must be an object."),
+        (False, "Transaction must be an object."),
+        (False, "Transaction must be an object."),
+        (True, None)
+    ]
+    assert positions == [4]
+
+
+def test_unknown_transaction_type():
+    assert validate_batch("Salaries", [HIRE], _existing_ids) == ([(False, "Invalid transaction type.")], [], [])
+
+
+def _hires(database):
+    connection = sqlite3.connect(database)
+    rows = connection.execute(
+        "SELECT FirstName, LastName, HireDate, JobID, DepartmentID FROM HiredEmployees ORDER BY FirstName, LastName, HireDate"
+    ).fetchall()
+    connection.execute("DELETE FROM HiredEmployees")
+    connection.commit()
+    connection.close()
+    return rows
+
+
+def test_row_bulk_and_parallel_modes_agree(function_app, database):
+    transactions = validation_throughput.transactions("HiredEmployees", 600, 0.1, seed=3)
+    transactions[5] = "not an object"
+    summaries = {}
+    rows = {}
+    for mode in ("row", "bulk", "parallel"):
+        summaries[mode] = function_app.process_transactions("HiredEmployees", transactions, mode, 100, shard_size=150, write_concurrency=2)
+        rows[mode] = _hires(database)
+
+    assert summaries["row"]["failureCount"] > 0
+    assert summaries["bulk"] == summaries["row"]
+    assert summaries["parallel"] == summaries["row"]
+    assert len(rows["row"]) == summaries["row"]["successCount"]
+    assert rows["bulk"] == rows["row"]
+    assert rows["parallel"] == rows["row"]
+
+
+@pytest.mark.parametrize("transaction_type", sorted(HANDLERS))
+def test_validation_throughput(transaction_type):
+    batch = validation_throughput.transactions(transaction_type, 50000, 0.05)
+    result = validation_throughput.measure(transaction_type, batch, 3)
+    assert result["rowsPerSecond"] >= MIN_ROWS_PER_SECOND, result
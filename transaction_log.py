@@ -0,0 +1,126 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from database_connection import DatabaseConnection
+from metrics import registry
+
+INSERT_TRANSACTION_LOG = "INSERT INTO GlobantPoc.TransactionLogs (TransactionType, TransactionData, ErrorMessage) VALUES (?, ?, ?)"
+
+transaction_log_records = registry.counter(
+    "globant_transaction_log_records_total", "Transaction error records by outcome (written, dropped, failed)."
+)
+
+
+def async_logging_enabled():
+    return os.getenv("TRANSACTION_LOG_ASYNC", "true").lower() == "true"
+
+
+# Escribe los errores de transacciones en TransactionLogs desde un hilo en segundo plano,
+# en lotes por tamano (flush_size) o por tiempo (flush_interval)
+class TransactionLogWriter:
+    def __init__(self, max_queue_size, flush_size, flush_interval, enqueue_timeout):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # Con la cola llena espera hasta enqueue_timeout (backpressure); despues descarta el registro
+    def log(self, transaction_type, transaction_data, error_message):
+        self._ensure_started()
+        record = (transaction_type, json.dumps(transaction_data), error_message)
+        try:
+            self._queue.put(record, timeout=self.enqueue_timeout)
+        except queue.Full:
+            transaction_log_records.inc(outcome="dropped")
+            logging.warning(f"Transaction log queue full, dropping error record for {transaction_type}.")
+            return False
+        return True
+
+    # Bloquea hasta que todo lo encolado se haya escrito (o descartado por error)
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        # Marca de fin: el hilo escribe lo pendiente y termina sin esperar flush_interval
+        self._queue.put(None)
+        thread.join()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "maxQueueSize": self._queue.maxsize,
+            "written": transaction_log_records.value(outcome="written"),
+            "dropped": transaction_log_records.value(outcome="dropped"),
+            "failed": transaction_log_records.value(outcome="failed")
+        }
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="transaction-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+                if record is None:
+                    self._queue.task_done()
+                    stopping = True
+                else:
+                    batch.append(record)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if batch and (len(batch) >= self.flush_size or time.monotonic() >= deadline or stopping):
+                self._write(batch)
+                batch, deadline = [], None
+            if stopping:
+                return
+
+    def _write(self, batch):
+        connection = None
+        try:
+            connection = DatabaseConnection().connect()
+            cursor = connection.cursor()
+            try:
+                cursor.fast_executemany = True
+                cursor.executemany(INSERT_TRANSACTION_LOG, batch)
+                connection.commit()
+            finally:
+                cursor.close()
+            transaction_log_records.inc(len(batch), outcome="written")
+        except Exception as e:
+            transaction_log_records.inc(len(batch), outcome="failed")
+            logging.error(f"Error writing {len(batch)} transaction log records: {str(e)}")
+        finally:
+            if connection is not None:
+                connection.close()
+            for _ in batch:
+                self._queue.task_done()
+
+
+transaction_log_writer = TransactionLogWriter(
+    max_queue_size=int(os.getenv("TRANSACTION_LOG_MAX_QUEUE", "10000")),
+    flush_size=int(os.getenv("TRANSACTION_LOG_FLUSH_SIZE", "500")),
+    flush_interval=float(os.getenv("TRANSACTION_LOG_FLUSH_INTERVAL", "1")),
+    enqueue_timeout=float(os.getenv("TRANSACTION_LOG_ENQUEUE_TIMEOUT", "0.5"))
+)
+
+atexit.register(transaction_log_writer.close)
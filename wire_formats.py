@@ -0,0 +1,202 @@
+import contextvars
+import functools
+import importlib
+import json
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+# Formatos de respuesta/entrada negociados con Accept y Content-Type
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.globant.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+MEDIA_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/vnd.apache.arrow.file": ARROW
+}
+
+# Paquete opcional que necesita cada formato (orjson es opcional para JSON: sin el se usa json)
+OPTIONAL_PACKAGES = {
+    MSGPACK: "msgpack",
+    ARROW: "pyarrow"
+}
+
+# Sufijo del ETag para que cada representacion tenga el suyo
+ETAG_SUFFIXES = {
+    JSON: "",
+    COLUMNAR_JSON: "-columnar",
+    MSGPACK: "-msgpack",
+    ARROW: "-arrow"
+}
+
+_response_media_type = contextvars.ContextVar("response_media_type", default=JSON)
+
+
+@functools.lru_cache(maxsize=None)
+def _optional(package):
+    try:
+        return importlib.import_module(package)
+    except ImportError:
+        return None
+
+
+def available(media_type):
+    package = OPTIONAL_PACKAGES.get(media_type)
+    return package is None or _optional(package) is not None
+
+
+def _parse_accept(header):
+    entries = []
+    for position, part in enumerate(header.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        entries.append((-quality, position, MEDIA_ALIASES.get(media_type.lower(), media_type.lower())))
+    return [media_type for quality, _, media_type in sorted(entries) if quality < 0]
+
+
+# Elige el formato de respuesta segun Accept; None si el cliente solo acepta formatos no disponibles
+def negotiate(accept_header):
+    if not accept_header:
+        return JSON
+    for media_type in _parse_accept(accept_header):
+        if media_type in ("*/*", "application/*", JSON):
+            return JSON
+        if media_type in ETAG_SUFFIXES and available(media_type):
+            return media_type
+    return None
+
+
+def set_response_media_type(media_type):
+    _response_media_type.set(media_type)
+
+
+def response_media_type():
+    return _response_media_type.get()
+
+
+def dumps_json(value):
+    orjson = _optional("orjson")
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(payload):
+    orjson = _optional("orjson")
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _is_table(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+# Listas de objetos -> {"columns": [...], "rows": [[...], ...]}, sin repetir los nombres en cada fila
+def to_columnar(value):
+    if _is_table(value):
+        columns = list(value[0])
+        for item in value[1:]:
+            columns.extend(column for column in item if column not in columns)
+        return {"columns": columns, "rows": [[item.get(column) for column in columns] for item in value]}
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    return value
+
+
+# Inverso de to_columnar para un cuerpo de entrada: {"columns", "rows"} -> lista de objetos
+def from_columnar(columns, rows):
+    if not isinstance(columns, list) or not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Columnar payloads need 'columns' and 'rows' arrays.")
+    if any(not isinstance(row, list) or len(row) != len(columns) for row in rows):
+        raise HTTPException(status_code=400, detail="Every row must have one value per column.")
+    return [dict(zip(columns, row)) for row in rows]
+
+
+# Arrow: la tabla principal (la respuesta o su unica lista de objetos) y el resto como metadatos
+def _to_arrow(value):
+    pa = importlib.import_module("pyarrow")
+    metadata = {}
+    rows = value
+    if isinstance(value, dict):
+        tables = [key for key, item in value.items() if isinstance(item, list)]
+        if len(tables) == 1:
+            rows = value[tables[0]]
+            metadata = {key: json.dumps(item, default=str) for key, item in value.items() if key != tables[0]}
+        else:
+            rows = [value]
+    if not isinstance(rows, list):
+        rows = [{"value": rows}]
+    table = pa.Table.from_pylist(rows)
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(value, media_type):
+    if media_type == COLUMNAR_JSON:
+        return dumps_json(to_columnar(value))
+    if media_type == MSGPACK:
+        msgpack = importlib.import_module("msgpack")
+        return msgpack.packb(to_columnar(value), default=str, use_bin_type=True)
+    if media_type == ARROW:
+        return _to_arrow(value)
+    return dumps_json(value)
+
+
+# Respuesta por defecto de la app: se codifica en el formato negociado para la peticion actual
+class NegotiatedResponse(Response):
+    media_type = JSON
+
+    def __init__(self, content=None, status_code=200, headers=None, media_type=None, background=None):
+        self._negotiated = media_type or response_media_type()
+        super().__init__(content, status_code, headers, self._negotiated, background)
+        self.headers["Vary"] = "Accept"
+
+    def render(self, content):
+        return encode(content, self._negotiated)
+
+
+# Cuerpo de una peticion en cualquiera de los formatos; Arrow llega como tabla y se devuelve como lista de objetos
+def decode_body(payload, content_type, params):
+    media_type = (content_type or JSON).split(";")[0].strip().lower()
+    media_type = MEDIA_ALIASES.get(media_type, media_type)
+    if media_type in OPTIONAL_PACKAGES and not available(media_type):
+        raise HTTPException(status_code=415, detail=f"{media_type} requires the optional package {OPTIONAL_PACKAGES[media_type]}.")
+
+    try:
+        if media_type == MSGPACK:
+            body = importlib.import_module("msgpack").unpackb(payload, raw=False)
+        elif media_type == ARROW:
+            pa = importlib.import_module("pyarrow")
+            table = pa.ipc.open_stream(pa.BufferReader(payload)).read_all()
+            metadata = {key.decode("utf-8"): value.decode("utf-8") for key, value in (table.schema.metadata or {}).items()}
+            body = dict(metadata, transactions=table.to_pylist())
+        else:
+            body = loads_json(payload)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {media_type} body: {str(e)}")
+
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="The request body must be an object.")
+    # Los parametros de la URL completan lo que no venga en el cuerpo (p. ej. transactionType con Arrow)
+    return {**params, **body}
+
+
+# Transacciones de /InsertData: lista de objetos ("transactions") o formato columnar ("columns" + "rows")
+def transactions_from_body(body):
+    if "columns" in body or "rows" in body:
+        return from_columnar(body.get("columns"), body.get("rows"))
+    return body.get("transactions")
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import logging
+import os
+from executors import run_blocking
+from metrics import registry
+
+coalesced_flushes = registry.counter(
+    "globant_insert_coalesced_flushes_total", "Coalesced InsertData batches written, by transactionType and trigger (size, time, shutdown)."
+)
+coalesced_rows = registry.counter("globant_insert_coalesced_rows_total", "Rows written through coalesced InsertData batches.")
+coalesced_batch_requests = registry.histogram(
+    "globant_insert_coalesced_batch_requests", "Requests merged into each coalesced batch.", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+
+def coalescing_enabled():
+    return os.getenv("INSERT_COALESCE", "false").lower() == "true"
+
+
+# Filas pendientes de un transactionType y la parte que le corresponde a cada peticion
+class PendingBatch:
+    def __init__(self):
+        self.transactions = []
+        self.waiters = []
+        self.timer = None
+
+
+# Junta las filas de peticiones concurrentes del mismo transactionType en una sola transaccion de BD.
+# Se escribe al llegar a max_rows o al pasar max_wait segundos desde la primera fila, lo que ocurra antes.
+class WriteCoalescer:
+    def __init__(self, max_rows, max_wait):
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.writer = None
+        self._batches = {}
+        self._tasks = set()
+
+    def register(self, writer):
+        self.writer = writer
+
+    # Devuelve (success, error) por fila, en el mismo orden en que llegaron
+    async def submit(self, transaction_type, transactions):
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(transaction_type)
+        if batch is None:
+            batch = PendingBatch()
+            self._batches[transaction_type] = batch
+            batch.timer = loop.call_later(self.max_wait, self._flush, transaction_type, "time", context=contextvars.Context())
+
+        future = loop.create_future()
+        batch.waiters.append((future, len(batch.transactions), len(transactions)))
+        batch.transactions.extend(transactions)
+        if len(batch.transactions) >= self.max_rows:
+            self._flush(transaction_type, "size")
+        return await future
+
+    def _flush(self, transaction_type, trigger):
+        batch = self._batches.pop(transaction_type, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        coalesced_flushes.inc(transaction_type=transaction_type, trigger=trigger)
+        coalesced_batch_requests.observe(len(batch.waiters))
+        # La escritura no hereda el contexto (ni las metricas por etapa) de la peticion que la disparo
+        task = contextvars.Context().run(asyncio.ensure_future, self._write(transaction_type, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, transaction_type, batch):
+        try:
+            results = await run_blocking("insert", self.writer, transaction_type, batch.transactions)
+        except Exception as e:
+            logging.error(f"Coalesced insert of {len(batch.transactions)} {transaction_type} rows failed: {str(e)}")
+            for future, _, _ in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        coalesced_rows.inc(len(batch.transactions), transaction_type=transaction_type)
+        for future, start, count in batch.waiters:
+            if not future.done():
+                future.set_result(results[start:start + count])
+
+    # Escribe lo pendiente y espera las escrituras en curso (al detener la app)
+    async def close(self):
+        for transaction_type in list(self._batches):
+            self._flush(transaction_type, "shutdown")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "enabled": coalescing_enabled(),
+            "maxRows": self.max_rows,
+            "maxWaitMs": self.max_wait * 1000,
+            "pendingRows": {transaction_type: len(batch.transactions) for transaction_type, batch in self._batches.items()},
+            "writesInFlight": len(self._tasks)
+        }
+
+
+write_coalescer = WriteCoalescer(
+    int(os.getenv("INSERT_COALESCE_MAX_ROWS", "500")),
+    float(os.getenv("INSERT_COALESCE_MAX_WAIT_MS", "10")) / 1000
+)